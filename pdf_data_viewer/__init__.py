@@ -19,22 +19,40 @@ else:
     MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
     PROJECT_ROOT = os.path.dirname(MODULE_DIR)  # Go up one level from the module directory
 
-# Create logs directory at project root
-logs_dir = os.path.join(PROJECT_ROOT, "logs")
-os.makedirs(logs_dir, exist_ok=True)
+# Stay silent by default; handlers are only attached by _configure_logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
-# Configure logging
-log_file = os.path.join(logs_dir, 'pdf_data_viewer.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
+def _configure_logging():
+    """
+    Set up the application log file, plus console output when attached to a terminal.
+    
+    Returns:
+        str: Path to the log file
+    """
+    # Create logs directory at project root
+    logs_dir = os.path.join(PROJECT_ROOT, "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+    
+    log_file = os.path.join(logs_dir, 'pdf_data_viewer.log')
+    handlers = [logging.FileHandler(log_file)]
+    
+    # Only echo to stderr for interactive runs (stderr is None in windowed builds)
+    if sys.stderr is not None and sys.stderr.isatty():
+        handlers.append(logging.StreamHandler())
+    
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+    
+    # Log the paths to verify everything is set up correctly
+    logger = logging.getLogger(__name__)
+    logger.info(f"Application started. Project root: {PROJECT_ROOT}")
+    logger.info(f"Log file location: {log_file}")
+    return log_file
 
-# Log the paths to verify everything is set up correctly
-logger = logging.getLogger(__name__)
-logger.info(f"Application started. Project root: {PROJECT_ROOT}")
-logger.info(f"Log file location: {log_file}")
\ No newline at end of file
+# Set PDFV_LOGGING=0 to skip handler setup, e.g. for batch tools that only use AnnotationDB
+if os.environ.get("PDFV_LOGGING", "1") != "0":
+    _configure_logging()
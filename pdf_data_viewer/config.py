@@ -11,7 +11,12 @@ DEFAULT_ZOOM_FACTOR = 1.0
 MIN_ZOOM = 0.1
 MAX_ZOOM = 8.0
 DEFAULT_DPI = 300
+MAX_RENDER_DPI = 600  # Pages are never rasterized finer than this, however far they are zoomed in
+# Device pixels rendered per screen pixel for each render quality setting
+RENDER_OVERSAMPLE = {"standard": 1.0, "high": 1.5, "very high": 2.0}
 PAGE_GAP = 20  # Gap between pages in vertical view
+PAGE_CACHE_SIZE = 8  # Number of rendered pages kept in memory
+PRERENDER_PAGES = 2  # Pages rendered in the background on each side of the visible ones
 
 # Annotation settings
 HIGHLIGHT_COLOR = (0, 0, 255, 128)  # RGBA for annotations
@@ -33,8 +38,8 @@ DB_PATH = os.path.join(DATA_DIR, "annotations.db")
 EXPORT_DIR = os.path.join(DATA_DIR, "exports")
 os.makedirs(EXPORT_DIR, exist_ok=True)
 
-# Date fields for standardization
-DATE_FIELDS = ['rfq_date', 'due_date', 'requested_delivery_date']
+# Date fields for standardization (frozenset for fast membership checks)
+DATE_FIELDS = frozenset(['rfq_date', 'due_date', 'requested_delivery_date'])
 
 # Metadata fields
 META_FIELDS = [
@@ -1,8 +1,10 @@
 """Handler for PDF annotations."""
 
 import fitz
+from collections import defaultdict
+from itertools import islice
 from ..config import DATE_FIELDS
-from ..utils.date_utils import standardize_date
+from ..utils.date_utils import clean_date_text, standardize_date
 
 class AnnotationHandler:
     """Handler for PDF annotation operations."""
@@ -17,10 +19,16 @@ class AnnotationHandler:
         self.pdf_document = pdf_document
         self.annotations = []
         self.last_line_item_number = ""
+        # Positions in self.annotations of saved annotations, keyed by their database id
+        self._positions = {}
+        # Highlight rects waiting to be applied by flush(), keyed by page number
+        self._pending = defaultdict(list)
     
     def clear_annotations(self):
         """Clear all annotations from memory."""
         self.annotations = []
+        self._positions.clear()
+        self._pending.clear()
     
     def add_annotation(self, page_num, rect, text, field_info=None, is_multipage=False, multipage_position=None, multipage_type='', group_id=''):
         """
@@ -40,13 +48,101 @@ class AnnotationHandler:
             dict: The created annotation data
         """
         # Add highlight to the PDF document
-        self.pdf_document.add_highlight_annotation(page_num, rect)
+        xref = self.pdf_document.add_highlight_annotation(page_num, rect)
         
+        annotation = self._store_annotation(page_num, rect, text, field_info, is_multipage,
+                                            multipage_position, multipage_type, group_id)
+        
+        # Remember the highlight's xref so it can be removed directly
+        if xref is not None:
+            annotation['xref'] = xref
+        
+        return annotation
+    
+    def bulk_append(self, annotations):
+        """
+        Append already built annotations, e.g. ones loaded from the database.
+        
+        Their highlights are queued like those of add_annotation_deferred;
+        call flush() to apply them.
+        
+        Args:
+            annotations (list): Annotation dictionaries with 'page' and 'rect'
+        """
+        start = len(self.annotations)
+        self.annotations.extend(annotations)
+        for position, annotation in enumerate(annotations, start):
+            self._pending[annotation['page']].append((annotation['rect'], annotation))
+            if 'id' in annotation:
+                self._positions[annotation['id']] = position
+    
+    def set_annotation_id(self, annotation, annotation_id):
+        """
+        Record the database id of an annotation once it has been saved.
+        
+        Args:
+            annotation (dict): Annotation data
+            annotation_id (int): Database id
+        """
+        annotation['id'] = annotation_id
+        # Annotations are saved shortly after they are added, so search from the end
+        for position in range(len(self.annotations) - 1, -1, -1):
+            if self.annotations[position] is annotation:
+                self._positions[annotation_id] = position
+                break
+    
+    def get_annotation(self, annotation_id):
+        """
+        Look up an annotation by its database id.
+        
+        Args:
+            annotation_id (int): Database id
+            
+        Returns:
+            dict or None: The annotation, or None if there is none with that id
+        """
+        position = self._positions.get(annotation_id)
+        return None if position is None else self.annotations[position]
+    
+    def add_annotation_deferred(self, page_num, rect, text, field_info=None, is_multipage=False, multipage_position=None, multipage_type='', group_id=''):
+        """
+        Add an annotation but queue its PDF highlight until flush() is called.
+        
+        Use this for bulk additions so each page is touched once in flush()
+        instead of once per annotation. Arguments are the same as add_annotation.
+        
+        Returns:
+            dict: The created annotation data
+        """
+        annotation = self._store_annotation(page_num, rect, text, field_info, is_multipage,
+                                            multipage_position, multipage_type, group_id)
+        self._pending[page_num].append((rect, annotation))
+        
+        return annotation
+    
+    def flush(self):
+        """
+        Apply all queued highlights, one pass per page.
+        
+        Returns:
+            list: Sorted page numbers that received highlights (and need re-rendering)
+        """
+        pages = sorted(self._pending)
+        for page_num in pages:
+            pending = self._pending[page_num]
+            xrefs = self.pdf_document.add_highlight_annotations(page_num, [rect for rect, _ in pending])
+            for (_, annotation), xref in zip(pending, xrefs):
+                if xref is not None:
+                    annotation['xref'] = xref
+        self._pending.clear()
+        return pages
+    
+    def _store_annotation(self, page_num, rect, text, field_info, is_multipage, multipage_position, multipage_type, group_id):
+        """Build the annotation data and append it to the annotations list."""
         # Create annotation object
         annotation = {
             'page': page_num,
             'rect': rect,
-            'rect_str': f"({rect.x0:.2f}, {rect.y0:.2f}, {rect.x1:.2f}, {rect.y1:.2f})",
             'text': text,
             'annot_id': len(self.annotations)  # Use a unique ID
         }
@@ -94,29 +190,49 @@ class AnnotationHandler:
         """
         if not self.annotations or index < 0 or index >= len(self.annotations):
             return False
+        
+        # Positions below refer to highlights in the document, so apply queued ones first
+        self.flush()
             
         # Get the annotation to remove
         annotation = self.annotations[index]
         page_num = annotation['page']
         
-        # Find position of this annotation among annotations on the same page
-        page_annotations = [(i, a) for i, a in enumerate(self.annotations) if a['page'] == page_num]
+        # Remove from the document, directly by xref when it is known and still valid
+        xref = annotation.get('xref')
+        removed = xref is not None and self.pdf_document.remove_annotation_by_xref(page_num, xref)
+        if not removed:
+            # Fall back to this annotation's position among annotations on the
+            # same page, i.e. the number of earlier annotations on that page
+            annot_position = sum(1 for annot in islice(self.annotations, index) if annot['page'] == page_num)
+            removed = self.pdf_document.remove_annotation(page_num, annot_position)
         
-        # Find the position of our annotation within that page's annotations
-        annot_position = None
-        for i, (list_idx, annot) in enumerate(page_annotations):
-            if list_idx == index:
-                annot_position = i
-                break
-        
-        # Remove from the document
-        if self.pdf_document.remove_annotation(page_num, annot_position):
-            # Remove from our annotations list
+        if removed:
+            # Remove from our annotations list; later saved annotations move up one
             self.annotations.pop(index)
+            self._positions.pop(annotation.get('id'), None)
+            for later in islice(self.annotations, index, None):
+                if 'id' in later:
+                    self._positions[later['id']] -= 1
             return True
             
         return False
     
+    def remove_annotation_by_id(self, annotation_id):
+        """
+        Remove an annotation by its database id.
+        
+        Args:
+            annotation_id (int): Database id
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        position = self._positions.get(annotation_id)
+        if position is None:
+            return False
+        return self.remove_annotation_by_index(position)
+    
     def remove_last_annotation(self):
         """
         Remove the last annotation added.
@@ -126,19 +242,39 @@ class AnnotationHandler:
         """
         if not self.annotations:
             return False
+        
+        # Make sure the last annotation's highlight is actually in the document
+        self.flush()
             
         # Get the last annotation
         last_annot = self.annotations[-1]
         page_num = last_annot['page']
         
         # Remove from the document
-        if self.pdf_document.remove_annotation(page_num):
+        if self.pdf_document.remove_annotation(page_num, xref=last_annot.get('xref')):
             # Remove from our list
             self.annotations.pop()
+            self._positions.pop(last_annot.get('id'), None)
             return True
             
         return False
     
+    @staticmethod
+    def format_rect(rect):
+        """
+        Format rectangle coordinates for display.
+        
+        Annotations no longer carry a precomputed 'rect_str'; use this on
+        demand instead.
+        
+        Args:
+            rect (fitz.Rect or tuple): Rectangle coordinates
+            
+        Returns:
+            str: Coordinates formatted as "(x0, y0, x1, y1)" with two decimals
+        """
+        return "(%.2f, %.2f, %.2f, %.2f)" % tuple(rect)
+    
     @staticmethod
     def clean_text_for_date_field(text, field_type):
         """
@@ -152,5 +288,5 @@ class AnnotationHandler:
             str: Cleaned text
         """
         if field_type in DATE_FIELDS:
-            return text.replace('[', '').replace(']', '').strip()
+            return clean_date_text(text)
         return text
\ No newline at end of file
@@ -1,18 +1,151 @@
 """Core functionality for handling PDF documents."""
 
 import fitz  # PyMuPDF
+import functools
+import heapq
+import logging
+import threading
+from collections import OrderedDict, deque
 from PySide6.QtGui import QImage, QPixmap
-from PySide6.QtCore import QRectF
+from PySide6.QtCore import QMetaObject, QObject, QRectF, Qt, QThread, Slot
+from ..config import MAX_RENDER_DPI, PAGE_CACHE_SIZE
+
+# Get a logger for this module
+logger = logging.getLogger(__name__)
+
+# PyMuPDF initializes MuPDF for single-threaded use, so no two threads may be
+# inside MuPDF at once, even on different documents. Everything that calls
+# into it, including the render thread, holds this lock.
+_mupdf_lock = threading.RLock()
+
+
+def _holding_mupdf_lock(method):
+    """Decorate a method so it runs with the MuPDF lock held."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with _mupdf_lock:
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class _PrerenderRelay(QObject):
+    """
+    Carries finished background renders back to the UI thread.
+    
+    Created on the UI thread, so a queued invokeMethod from the render thread
+    runs deliver() there. This is used instead of a Python signal because
+    Signal.emit leaks a reference per call on some PySide6 releases (6.12),
+    which aborts the interpreter after a few thousand pages.
+    """
+    
+    def __init__(self, owner):
+        """
+        Initialize the relay.
+        
+        Args:
+            owner (PDFDocument): Document handler that receives the results
+        """
+        super().__init__()
+        self.owner = owner
+        self._results = deque()  # (key, generation, QImage or None)
+    
+    def post(self, key, generation, image):
+        """Queue a finished render for the UI thread. Called on the render thread."""
+        self._results.append((key, generation, image))
+        QMetaObject.invokeMethod(self, "deliver", Qt.QueuedConnection)
+    
+    @Slot()
+    def deliver(self):
+        """Hand finished renders to the owner on the UI thread."""
+        while self._results:
+            self.owner._promote_prerendered(*self._results.popleft())
+
+
+class _RenderThread(QThread):
+    """
+    Worker that does all background rasterization.
+    
+    Pages are rendered one at a time, highest priority first, from the
+    owner's document while holding the MuPDF lock. The thread exits when it
+    runs out of work and submit() starts it again, so an idle document
+    doesn't hold a running thread that Qt would abort on at shutdown.
+    """
+    
+    def __init__(self, owner):
+        """
+        Initialize the thread.
+        
+        Args:
+            owner (PDFDocument): Document handler to render pages of
+        """
+        super().__init__()
+        self.owner = owner
+        self._lock = threading.Lock()
+        self._queue = []  # Heap of (-priority, sequence, key, generation)
+        self._queued = {}  # Latest priority of each queued key
+        self._sequence = 0
+        self._active = False  # Whether run() will still pick up new entries
+    
+    def submit(self, key, generation, priority):
+        """
+        Queue a page render, starting the thread if needed.
+        
+        Queueing a key again replaces its earlier entry.
+        
+        Args:
+            key (tuple): Cache key (page_num, dpi, render_quality, target_width_px)
+            generation (int): Owner generation the render was queued in
+            priority (int): Higher renders sooner
+        """
+        with self._lock:
+            self._queued[key] = priority
+            self._sequence += 1
+            heapq.heappush(self._queue, (-priority, self._sequence, key, generation))
+            start = not self._active
+            self._active = True
+        if start:
+            # A thread that just ran out of work may still be returning from run()
+            self.wait()
+            self.start()
+    
+    def clear(self):
+        """Drop all queued renders; one already in progress still finishes."""
+        with self._lock:
+            self._queue.clear()
+            self._queued.clear()
+    
+    def stop(self):
+        """Drop queued renders and wait for the thread to exit."""
+        self.clear()
+        self.wait()
+    
+    def run(self):
+        """Render queued pages until there are none left."""
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._active = False
+                    return
+                neg_priority, _, key, generation = heapq.heappop(self._queue)
+                # Skip entries replaced by a later submit or dropped by clear
+                if self._queued.get(key) != -neg_priority:
+                    continue
+                del self._queued[key]
+            image = self.owner._render_in_background(key, generation)
+            self.owner._relay.post(key, generation, image)
 
 class PDFDocument:
     """Handler for PDF document operations."""
     
-    def __init__(self, dpi=300, render_quality="high"):
+    # Render thread priority of neighbor prefetches, so they run before other prerenders
+    PREFETCH_PRIORITY = 1
+    
+    def __init__(self, dpi=MAX_RENDER_DPI, render_quality="high"):
         """
         Initialize the PDF document handler.
         
         Args:
-            dpi (int): DPI for rendering
+            dpi (int): Highest DPI pages are rendered at, however far they are zoomed in
             render_quality (str): Quality setting for rendering (standard, high, very high)
         """
         self.doc = None
@@ -20,7 +153,28 @@ class PDFDocument:
         self.page_count = 0
         self.dpi = dpi
         self.render_quality = render_quality
+        
+        # LRU cache of rendered pages keyed by (page_num, dpi, render_quality, target_width_px)
+        self._page_cache = OrderedDict()
+        # Word positions per page, filled lazily by get_words()
+        self._words_cache = {}
+        
+        # Background prerendering of neighboring pages. The render thread
+        # builds QImages; the relay turns them into cached QPixmaps on the UI
+        # thread. _prerendering is only touched from the UI thread, the rest
+        # is shared with the render thread under the MuPDF lock.
+        self._relay = _PrerenderRelay(self)
+        self._render_thread = _RenderThread(self)
+        self._prerendering = {}  # Priority of each queued prerender, by cache key
+        self._generation = 0
+        # Pages whose highlights changed since they were opened; these are
+        # always rendered synchronously so edits show up right away
+        self._modified_pages = set()
+        # Called as callback(key, page_info) on the UI thread when a
+        # background render has been cached
+        self.page_ready_callback = None
     
+    @_holding_mupdf_lock
     def load(self, file_path):
         """
         Load a PDF document.
@@ -35,6 +189,7 @@ class PDFDocument:
             # Close existing document if open
             if self.doc:
                 self.doc.close()
+            self.clear_cache()
                 
             self.doc = fitz.open(file_path)
             self.file_path = file_path
@@ -43,23 +198,57 @@ class PDFDocument:
             return self.page_count > 0
             
         except Exception as e:
-            print(f"Error loading PDF: {str(e)}")
+            logger.error("Error loading PDF: %s", e)
             return False
     
     def close(self):
-        """Close the current document."""
-        if self.doc:
-            self.doc.close()
-            self.doc = None
-            self.file_path = None
-            self.page_count = 0
+        """Close the current document and stop the render thread."""
+        # Stopped first so it can't be waiting on the lock for a page of this document
+        self._render_thread.stop()
+        with _mupdf_lock:
+            if self.doc:
+                self.doc.close()
+                self.doc = None
+                self.file_path = None
+                self.page_count = 0
+            self.clear_cache()
     
-    def render_page(self, page_num):
+    @_holding_mupdf_lock
+    def clear_cache(self):
+        """Drop all cached page renders and word positions."""
+        self._page_cache.clear()
+        self._words_cache.clear()
+        self._modified_pages.clear()
+        # A render still in progress belongs to the old generation
+        self._generation += 1
+        self._render_thread.clear()
+        self._prerendering.clear()
+    
+    @_holding_mupdf_lock
+    def invalidate_page(self, page_num):
+        """
+        Drop cached renders of a page, e.g. after its annotations changed.
+        
+        Args:
+            page_num (int): Page number
+        """
+        for key in [key for key in self._page_cache if key[0] == page_num]:
+            del self._page_cache[key]
+        self._modified_pages.add(page_num)
+    
+    @_holding_mupdf_lock
+    def render_page(self, page_num, prefetch=True, target_width_px=None):
         """
         Render a specific page to a QPixmap.
         
+        The page is rendered target_width_px wide, but never above the
+        configured DPI. page_info['scale'] holds the resulting
+        pixels per PDF point for mapping between the two.
+        
         Args:
             page_num (int): Page number to render
+            prefetch (bool): Prerender the neighboring pages in the background
+            target_width_px (int, optional): Width in device pixels the page is displayed at
             
         Returns:
             tuple: (QPixmap, dict) - Rendered page as pixmap and page info
@@ -67,41 +256,256 @@ class PDFDocument:
         if not self.doc or page_num < 0 or page_num >= self.page_count:
             return None, None
         
-        # Get the page
-        page = self.doc[page_num]
+        # Reuse a cached render when nothing relevant has changed
+        key = (page_num, self.dpi, self.render_quality, target_width_px)
+        cached = self._page_cache.get(key)
+        if cached is not None:
+            self._page_cache.move_to_end(key)
+            pixmap, page_info = cached
+            # Callers annotate page_info, so hand out a copy
+            return pixmap, dict(page_info)
+        
+        # Render and convert to QPixmap
+        pixmap = self._promote(self._decode(self.doc[page_num], self.dpi, target_width_px))
+        page_info = self._cache_page(key, pixmap)
         
-        # Create rendering parameters based on quality setting
-        render_params = {
-            "dpi": self.dpi,
-            "alpha": False
+        # Adjacent pages are almost always shown next
+        if prefetch:
+            self.prerender_page(page_num - 1, target_width_px, self.PREFETCH_PRIORITY)
+            self.prerender_page(page_num + 1, target_width_px, self.PREFETCH_PRIORITY)
+        
+        return pixmap, dict(page_info)
+    
+    @_holding_mupdf_lock
+    def page_layout(self, page_num, width):
+        """
+        Get the size of a page scaled to a width, without rasterizing it.
+        
+        Args:
+            page_num (int): Page number
+            width (int): Width to scale the page to
+            
+        Returns:
+            dict: 'width', 'height' and 'scale' (units of width per PDF point)
+        """
+        page = self.doc[page_num]
+        scale = width / page.rect.width if width > 0 and page.rect.width > 0 else 1.0
+        size = (page.rect * fitz.Matrix(scale, scale)).irect
+        return {
+            'width': size.width,
+            'height': size.height,
+            'scale': scale
         }
+    
+    @staticmethod
+    def _render_scale(page, dpi, target_width_px=None):
+        """
+        Get the pixels-per-point scale a page is rendered at.
+        
+        Args:
+            page (fitz.Page): Page to render
+            dpi (int): Maximum DPI for rendering
+            target_width_px (int, optional): Display width in device pixels
+            
+        Returns:
+            float: Scale factor from PDF points to pixels
+        """
+        scale = dpi / 72.0
+        if target_width_px and page.rect.width > 0:
+            # Never render wider than the page will be shown
+            scale = min(scale, target_width_px / page.rect.width)
+        return scale
+    
+    @staticmethod
+    def _decode(page, dpi, target_width_px=None):
+        """
+        Rasterize a page into a QImage without touching any Qt GUI objects.
+        
+        Safe to call from the render thread; the caller must hold the MuPDF lock.
         
-        # Apply matrix based on render quality
-        if self.render_quality == "high":
-            render_params["colorspace"] = fitz.csRGB
-            render_params["matrix"] = fitz.Matrix(2.0, 2.0)
-        elif self.render_quality == "very high":
-            render_params["colorspace"] = fitz.csRGB
-            render_params["matrix"] = fitz.Matrix(3.0, 3.0)
+        Args:
+            page (fitz.Page): Page to render
+            dpi (int): Maximum DPI for rendering
+            target_width_px (int, optional): Display width in device pixels
+            
+        Returns:
+            tuple: (QImage, fitz.Pixmap) - the image wraps the pixmap's buffer
+                   without copying it, so the pixmap must be kept alongside
+        """
+        scale = PDFDocument._render_scale(page, dpi, target_width_px)
         
         # Render page with settings
-        pix = page.get_pixmap(**render_params)
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=fitz.csRGB, alpha=False)
+        
+        # samples_mv is a view of MuPDF's buffer (samples would return a copy);
+        # stride is passed through so Qt doesn't re-align rows
+        img = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
+        return img, pix
+    
+    @staticmethod
+    def _promote(decoded):
+        """
+        Turn a decoded page into a QPixmap. Must run on the UI thread.
         
-        # Convert to QImage and QPixmap
-        img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(img)
+        Args:
+            decoded (tuple): (QImage, fitz.Pixmap) as returned by _decode
+            
+        Returns:
+            QPixmap: Pixmap holding its own copy of the pixels
+        """
+        img, pix = decoded
+        # pix owns the buffer img points into; it lives until fromImage has copied it
+        return QPixmap.fromImage(img)
+    
+    @_holding_mupdf_lock
+    def _cache_page(self, key, pixmap):
+        """
+        Store a rendered page in the LRU cache.
+        
+        Args:
+            key (tuple): Cache key (page_num, dpi, render_quality, target_width_px)
+            pixmap (QPixmap): Rendered page
+            
+        Returns:
+            dict: Page info for the cached render
+        """
+        page_num, dpi, render_quality, target_width_px = key
         
         # Create page info dict
         page_info = {
             'pixmap': pixmap,
             'width': pixmap.width(),
             'height': pixmap.height(),
-            'page_obj': page,
-            'words': page.get_text("words")  # Get word positions for text selection
+            'scale': self._render_scale(self.doc[page_num], dpi, target_width_px)
         }
         
-        return pixmap, page_info
+        self._page_cache[key] = (pixmap, page_info)
+        if len(self._page_cache) > PAGE_CACHE_SIZE:
+            self._page_cache.popitem(last=False)
+        return page_info
+    
+    def prerender_page(self, page_num, target_width_px=None, priority=0):
+        """
+        Schedule a background render of a page into the cache.
+        
+        Does nothing if the page is out of range, already cached or queued
+        at the same or a higher priority, or has highlights that were changed
+        and must be rendered synchronously.
+        
+        Args:
+            page_num (int): Page number to prerender
+            target_width_px (int, optional): Display width in device pixels
+            priority (int): Render thread priority; higher runs sooner
+            
+        Returns:
+            bool: True if a background render is queued for the page
+        """
+        if not self.doc or page_num < 0 or page_num >= self.page_count:
+            return False
+        if page_num in self._modified_pages:
+            return False
+        
+        key = (page_num, self.dpi, self.render_quality, target_width_px)
+        if key in self._page_cache:
+            return False
+        
+        queued_priority = self._prerendering.get(key)
+        if queued_priority is not None and queued_priority >= priority:
+            return True
+        self._prerendering[key] = priority
+        
+        self._render_thread.submit(key, self._generation, priority)
+        return True
+    
+    def cancel_prerendering(self):
+        """Drop all queued background renders; one already in progress still arrives."""
+        self._render_thread.clear()
+        self._prerendering.clear()
+    
+    def _render_in_background(self, key, generation):
+        """
+        Rasterize a queued page. Runs on the render thread.
+        
+        Args:
+            key (tuple): Cache key (page_num, dpi, render_quality, target_width_px)
+            generation (int): Generation the render was queued in
+            
+        Returns:
+            QImage or None: The page, or None if it is no longer wanted or failed
+        """
+        page_num, dpi, render_quality, target_width_px = key
+        with _mupdf_lock:
+            # The document may have been replaced, or the page rendered
+            # synchronously, since the render was queued
+            if generation != self._generation or key in self._page_cache:
+                return None
+            try:
+                img, pix = self._decode(self.doc[page_num], dpi, target_width_px)
+                # Copy out of MuPDF's buffer so the pixmap is freed here, under the lock
+                image = img.copy()
+                del img, pix
+                return image
+            except Exception as e:
+                logger.error("Error prerendering page %d: %s", page_num, e)
+                return None
+    
+    def _promote_prerendered(self, key, generation, image):
+        """
+        Cache a finished background render (called on the UI thread via the relay).
+        
+        Args:
+            key (tuple): Cache key (page_num, dpi, render_quality, target_width_px)
+            generation (int): Generation the render was queued in
+            image (QImage or None): The page, or None if it was skipped or failed
+        """
+        if generation != self._generation:
+            return
+        self._prerendering.pop(key, None)
+        
+        # Skip renders that were overtaken by a synchronous render or a highlight change
+        if image is None or key in self._page_cache or key[0] in self._modified_pages:
+            return
+        page_info = self._cache_page(key, QPixmap.fromImage(image))
+        if self.page_ready_callback:
+            self.page_ready_callback(key, dict(page_info))
+    
+    @_holding_mupdf_lock
+    def page_rect(self, page_num):
+        """
+        Get the bounds of a page in PDF coordinates.
+        
+        Args:
+            page_num (int): Page number
+            
+        Returns:
+            fitz.Rect: Page rectangle, or an empty one if the page doesn't exist
+        """
+        if not self.doc or page_num < 0 or page_num >= self.page_count:
+            return fitz.Rect()
+        return self.doc[page_num].rect
+    
+    @_holding_mupdf_lock
+    def get_words(self, page_num):
+        """
+        Get word positions on a page for text selection.
+        
+        Extracted on first use and cached, since highlights don't change them.
+        
+        Args:
+            page_num (int): Page number
+            
+        Returns:
+            list: Word tuples (x0, y0, x1, y1, word, block_no, line_no, word_no)
+        """
+        if not self.doc or page_num < 0 or page_num >= self.page_count:
+            return []
+        
+        words = self._words_cache.get(page_num)
+        if words is None:
+            words = self._words_cache[page_num] = self.doc[page_num].get_text("words")
+        return words
     
+    @_holding_mupdf_lock
     def get_text_in_rect(self, page_num, rect):
         """
         Get text within a rectangle on a specific page.
@@ -119,6 +523,7 @@ class PDFDocument:
         page = self.doc[page_num]
         return page.get_text("text", clip=rect)
     
+    @_holding_mupdf_lock
     def add_highlight_annotation(self, page_num, rect):
         """
         Add a highlight annotation to a page.
@@ -128,19 +533,49 @@ class PDFDocument:
             rect (fitz.Rect): Rectangle coordinates
             
         Returns:
-            fitz.Annot: The created annotation object or None if failed
+            int: PDF xref of the created annotation, or None if failed
         """
         if not self.doc or page_num < 0 or page_num >= self.page_count:
             return None
         
         page = self.doc[page_num]
+        self.invalidate_page(page_num)
         try:
-            return page.add_highlight_annot(rect)
+            # Only the xref leaves this method, so the annotation object is
+            # released while the MuPDF lock is still held
+            return page.add_highlight_annot(rect).xref
         except Exception as e:
-            print(f"Error adding highlight: {str(e)}")
+            logger.error("Error adding highlight: %s", e)
             return None
     
-    def remove_annotation(self, page_num, annot_idx=None):
+    @_holding_mupdf_lock
+    def add_highlight_annotations(self, page_num, rects):
+        """
+        Add several highlight annotations to a page, loading the page once.
+        
+        Args:
+            page_num (int): Page number
+            rects (list): List of fitz.Rect coordinates
+            
+        Returns:
+            list: PDF xrefs of the created annotations (None for any that failed)
+        """
+        if not self.doc or page_num < 0 or page_num >= self.page_count:
+            return []
+        
+        page = self.doc[page_num]
+        self.invalidate_page(page_num)
+        xrefs = []
+        for rect in rects:
+            try:
+                xrefs.append(page.add_highlight_annot(rect).xref)
+            except Exception as e:
+                logger.error("Error adding highlight: %s", e)
+                xrefs.append(None)
+        return xrefs
+    
+    @_holding_mupdf_lock
+    def remove_annotation(self, page_num, annot_idx=None, xref=None):
         """
         Remove an annotation from a page.
         
@@ -148,12 +583,19 @@ class PDFDocument:
             page_num (int): Page number
             annot_idx (int, optional): Index of the annotation to remove, 
                                       defaults to the last annotation
+            xref (int, optional): PDF xref of the annotation; when given the
+                                  annotation is loaded directly instead of
+                                  scanning the page, and annot_idx is only
+                                  used if the xref is stale
             
         Returns:
             bool: True if successful, False otherwise
         """
         if not self.doc or page_num < 0 or page_num >= self.page_count:
             return False
+        
+        if xref is not None and self.remove_annotation_by_xref(page_num, xref):
+            return True
             
         page = self.doc[page_num]
         
@@ -161,6 +603,7 @@ class PDFDocument:
             # Get all annotations on the page and convert to a list
             annotations = list(page.annots())
             if annotations and len(annotations) > 0:
+                self.invalidate_page(page_num)
                 if annot_idx is not None and 0 <= annot_idx < len(annotations):
                     # Remove the specific annotation if an index is provided
                     page.delete_annot(annotations[annot_idx])
@@ -170,11 +613,38 @@ class PDFDocument:
                 
                 return True
             else:
-                print("No annotations found on page")
+                logger.warning("No annotations found on page %d", page_num)
+        except Exception as e:
+            logger.error("Error removing annotation: %s", e)
+        return False
+    
+    @_holding_mupdf_lock
+    def remove_annotation_by_xref(self, page_num, xref):
+        """
+        Remove an annotation from a page by its PDF xref, without any fallback.
+        
+        Args:
+            page_num (int): Page number
+            xref (int): PDF xref of the annotation
+            
+        Returns:
+            bool: True if successful, False if the xref is stale or removal failed
+        """
+        if not self.doc or page_num < 0 or page_num >= self.page_count:
+            return False
+        
+        page = self.doc[page_num]
+        try:
+            annot = page.load_annot(xref)
+            if annot:
+                self.invalidate_page(page_num)
+                page.delete_annot(annot)
+                return True
         except Exception as e:
-            print(f"Error removing annotation: {str(e)}")
+            logger.warning("Error removing annotation by xref: %s", e)
         return False
     
+    @_holding_mupdf_lock
     def get_metadata(self):
         """
         Get document metadata.
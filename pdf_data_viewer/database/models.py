@@ -1,14 +1,110 @@
 """Database models for the PDF Data Viewer application."""
 
 import sqlite3
+import logging
 import os
 import csv
+import itertools
+import struct
+from functools import lru_cache
+from pathlib import Path
 from ..utils.date_utils import standardize_date
-from ..config import DB_PATH
+from ..config import DB_PATH, DATE_FIELDS
+
+# Get a logger for this module
+logger = logging.getLogger(__name__)
+
+# Rect coordinates are stored as one BLOB of four little-endian float32s
+_RECT_STRUCT = struct.Struct('<4f')
+
+@lru_cache(maxsize=1024)
+def _basename(path):
+    """Return the file name for a path; cached since the same PDF path repeats."""
+    return os.path.basename(path)
+
+def _pack_rect(x0, y0, x1, y1):
+    """Pack rect coordinates into the BLOB stored in the rect column."""
+    return _RECT_STRUCT.pack(x0, y0, x1, y1)
+
+def _unpack_rect(blob):
+    """
+    Unpack a rect BLOB into coordinates.
+    
+    Values are rounded to 3 decimals (a thousandth of a point) to drop the
+    float32 noise, e.g. 1.1 would otherwise read back as 1.100000023841858.
+    
+    Args:
+        blob (bytes): Value of the rect column
+        
+    Returns:
+        tuple: (x0, y0, x1, y1)
+    """
+    x0, y0, x1, y1 = _RECT_STRUCT.unpack(blob)
+    return (round(x0, 3), round(y0, 3), round(x1, 3), round(y1, 3))
 
 class AnnotationDB:
     """SQLite database handler for PDF annotations."""
     
+    # Statements are kept as constants so sqlite3's statement cache reuses
+    # the compiled form across calls
+    _SQL_CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,  -- rowid alias; AUTOINCREMENT would add a sqlite_sequence write per insert
+        file_name TEXT NOT NULL,
+        page_num INTEGER NOT NULL,
+        rect BLOB NOT NULL,      -- x0, y0, x1, y1 packed as little-endian float32s
+        annotation_text TEXT,
+        annotation_type TEXT NOT NULL,
+        field_name TEXT NOT NULL,
+        line_item_number TEXT,
+        standardized_date TEXT,
+        is_multipage BOOLEAN DEFAULT 0,
+        multipage_position INTEGER,  -- Changed to INTEGER for ordering (1,2,3...)
+        multipage_type TEXT,         -- New field for start/middle/end
+        group_id TEXT,               -- Keeping group_id as it's required for functionality
+        date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    '''
+    
+    _SQL_INSERT = '''
+    INSERT INTO annotations (
+        file_name, page_num, rect,
+        annotation_text, annotation_type, field_name, line_item_number, standardized_date,
+        is_multipage, multipage_position, multipage_type, group_id
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    _SQL_SELECT_BY_FILE = '''
+    SELECT id, page_num, rect,
+        annotation_text, annotation_type, field_name, line_item_number,
+        standardized_date, file_name, is_multipage, multipage_position, multipage_type, group_id
+    FROM annotations
+    WHERE file_name = ?
+    ORDER BY group_id, multipage_position, id
+    '''
+    
+    _SQL_DELETE = 'DELETE FROM annotations WHERE id = ?'
+    
+    # page_num + 1 gives human-readable page numbers straight from SQLite
+    _SQL_EXPORT_BY_FILE = '''
+    SELECT id, page_num + 1, rect,
+        annotation_text, annotation_type, field_name, line_item_number,
+        standardized_date, file_name, is_multipage, multipage_position, multipage_type, group_id
+    FROM annotations
+    WHERE file_name = ?
+    ORDER BY field_name, line_item_number, group_id, multipage_position, id
+    '''
+    
+    # Deletes after which close() returns free pages to the filesystem
+    _COMPACT_AFTER_DELETES = 100
+    
+    _CSV_FIELDNAMES = (
+        'id', 'file_name', 'page', 'type', 'field', 'line_item_number', 
+        'rect_x0', 'rect_y0', 'rect_x1', 'rect_y1',
+        'text', 'standardized_date', 
+        'is_multipage', 'multipage_position', 'multipage_type', 'multipage_group'
+    )
+    
     def __init__(self, db_path=DB_PATH):
         """
         Initialize the database connection.
@@ -18,49 +114,203 @@ class AnnotationDB:
         """
         self.db_path = db_path
         self.conn = None
-        self.cursor = None
+        self.read_only = False
+        self._deletes_since_compact = 0
         self.connect()
         self.create_tables()
     
+    @classmethod
+    def open_read_only(cls, db_path=DB_PATH):
+        """
+        Open a read-only handle for queries such as export_annotations_to_csv.
+        
+        Unlike the constructor this doesn't create, migrate or vacuum
+        anything, so it is cheap and safe to use from a worker thread while
+        the main connection is in use.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+            
+        Returns:
+            AnnotationDB: Read-only database handle; close() it when done
+        """
+        db = cls.__new__(cls)
+        db.db_path = db_path
+        db.conn = None
+        db.read_only = True
+        db._deletes_since_compact = 0
+        try:
+            uri = Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+            db.conn = sqlite3.connect(uri, uri=True)
+            db.conn.row_factory = sqlite3.Row
+        except sqlite3.Error as e:
+            logger.error("Database connection error: %s", e)
+        return db
+    
     def connect(self):
         """Connect to the SQLite database."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Autocommit mode: single statements commit on their own and batches
+            # are grouped explicitly with begin()/commit()
+            self.conn = sqlite3.connect(self.db_path, isolation_level=None, cached_statements=256)
             # Enable foreign key support
             self.conn.execute("PRAGMA foreign_keys = ON")
-            self.cursor = self.conn.cursor()
+            # WAL journaling with NORMAL sync avoids an fsync per commit
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+            self.conn.execute("PRAGMA temp_store = MEMORY")
+            self.conn.execute("PRAGMA mmap_size = 268435456")  # 256 MB
+            self.conn.execute("PRAGMA cache_size = -65536")    # 64 MB
+            # Queries go through conn.execute, so every cursor gets this row factory
+            self.conn.row_factory = sqlite3.Row
         except sqlite3.Error as e:
-            print(f"Database connection error: {str(e)}")
+            logger.error("Database connection error: %s", e)
     
     def create_tables(self):
         """Create necessary tables if they don't exist."""
+        # Optional; the schema below must be set up even if this fails
+        self._enable_incremental_vacuum()
+        
         try:
             # Create annotations table
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS annotations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_name TEXT NOT NULL,
-                page_num INTEGER NOT NULL,
-                rect_x0 REAL NOT NULL,
-                rect_y0 REAL NOT NULL,
-                rect_x1 REAL NOT NULL,
-                rect_y1 REAL NOT NULL,
-                annotation_text TEXT,
-                annotation_type TEXT NOT NULL,
-                field_name TEXT NOT NULL,
-                line_item_number TEXT,
-                standardized_date TEXT,
-                is_multipage BOOLEAN DEFAULT 0,
-                multipage_position INTEGER,  -- Changed to INTEGER for ordering (1,2,3...)
-                multipage_type TEXT,         -- New field for start/middle/end
-                group_id TEXT,               -- Keeping group_id as it's required for functionality
-                date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            self.conn.execute(self._SQL_CREATE_TABLE.format(table='annotations'))
+            
+            # Databases created before rects were packed still have REAL columns
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(annotations)")}
+            migrated = 'rect_x0' in columns
+            if migrated:
+                self._migrate_rect_columns()
+
+            # Indexes matching the per-file queries: the getter orders by
+            # group/position, the CSV export by field/line item
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_annotations_file_group "
+                "ON annotations(file_name, group_id, multipage_position, id)"
             )
-            ''')
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_annotations_file_field "
+                "ON annotations(file_name, field_name, line_item_number)"
+            )
+            # Superseded by the composite indexes above, which share its file_name prefix
+            self.conn.execute("DROP INDEX IF EXISTS idx_annotations_file_name")
             
-            self.conn.commit()
+            # Gather planner statistics once so SQLite picks the new indexes
+            has_stats = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            ).fetchone()
+            if has_stats is None or migrated:
+                self.conn.execute("ANALYZE")
+        except sqlite3.Error as e:
+            logger.error("Error creating tables: %s", e)
+    
+    def _enable_incremental_vacuum(self):
+        """
+        Switch the database to incremental auto-vacuum if it isn't already.
+        
+        Incremental auto-vacuum lets compact() release pages freed by
+        deletes. The file already exists once WAL is enabled, so the mode
+        only takes effect through a VACUUM (done once per database). The
+        VACUUM can fail, e.g. while another connection holds a lock or the
+        disk is low on space; the conversion is then retried on the next start.
+        """
+        try:
+            auto_vacuum = self.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if auto_vacuum != 2:  # 2 = INCREMENTAL
+                self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                self.conn.execute("VACUUM")
         except sqlite3.Error as e:
-            print(f"Error creating tables: {str(e)}")
+            logger.warning("Could not enable incremental auto-vacuum: %s", e)
+    
+    def _migrate_rect_columns(self):
+        """
+        Rebuild the annotations table, packing the four rect_* REAL columns into the rect BLOB.
+        
+        SQLite can't change a column's layout in place, so the rows are copied
+        into a new table that then replaces the old one, in one transaction.
+        """
+        self.conn.create_function("pack_rect", 4, _pack_rect, deterministic=True)
+        self.begin()
+        try:
+            self.conn.execute(self._SQL_CREATE_TABLE.format(table='annotations_new'))
+            self.conn.execute('''
+            INSERT INTO annotations_new (
+                id, file_name, page_num, rect,
+                annotation_text, annotation_type, field_name, line_item_number, standardized_date,
+                is_multipage, multipage_position, multipage_type, group_id, date_created
+            )
+            SELECT id, file_name, page_num, pack_rect(rect_x0, rect_y0, rect_x1, rect_y1),
+                annotation_text, annotation_type, field_name, line_item_number, standardized_date,
+                is_multipage, multipage_position, multipage_type, group_id, date_created
+            FROM annotations
+            ''')
+            # Dropping the old table also drops its indexes; create_tables recreates them
+            self.conn.execute("DROP TABLE annotations")
+            self.conn.execute("ALTER TABLE annotations_new RENAME TO annotations")
+            self.commit()
+        except sqlite3.Error:
+            self.rollback()
+            raise
+    
+    def begin(self):
+        """Start an explicit transaction to group several writes into one commit."""
+        # IMMEDIATE takes the write lock up front instead of upgrading mid-batch
+        self.conn.execute("BEGIN IMMEDIATE")
+    
+    def commit(self):
+        """Commit the transaction opened with begin()."""
+        self.conn.execute("COMMIT")
+    
+    def rollback(self):
+        """Roll back the transaction opened with begin()."""
+        self.conn.rollback()
+    
+    def _annotation_params(self, file_name, annotation):
+        """
+        Build the INSERT parameters for an annotation.
+        
+        Args:
+            file_name (str): Name of the PDF file (without directory)
+            annotation (dict): Annotation data
+            
+        Returns:
+            tuple: Parameters in the column order of the annotations INSERT
+        """
+        # Pack rect coordinates into a single BLOB
+        rect = annotation['rect']
+        rect_blob = _pack_rect(rect.x0, rect.y0, rect.x1, rect.y1)
+        
+        # Check if the field is a date field and should be converted
+        field_name = annotation.get('field', '')
+        standardized_date = None
+        
+        if field_name in DATE_FIELDS and annotation.get('text'):
+            # Use standardized_date if it's already in the annotation
+            if 'standardized_date' in annotation and annotation['standardized_date']:
+                standardized_date = annotation['standardized_date']
+            else:
+                # Try to convert the date
+                standardized_date = standardize_date(annotation.get('text', ''))
+        
+        # Check for multi-page annotation data
+        is_multipage = 1 if annotation.get('is_multipage', False) else 0
+        multipage_position = annotation.get('multipage_position', None)
+        multipage_type = annotation.get('multipage_type', '')
+        group_id = annotation.get('group_id', '')
+        
+        return (
+            file_name,
+            annotation['page'],
+            rect_blob,
+            annotation.get('text', ''),
+            annotation.get('type', ''),
+            field_name,
+            annotation.get('line_item_number', ''),
+            standardized_date,
+            is_multipage,
+            multipage_position,
+            multipage_type,
+            group_id
+        )
     
     def add_annotation(self, file_path, annotation):
         """
@@ -73,62 +323,52 @@ class AnnotationDB:
         Returns:
             int or None: ID of the new annotation or None if failed
         """
-        try:
-            # Extract just the filename (not the full path)
-            file_name = os.path.basename(file_path)
-            
-            # Extract rect coordinates
-            rect = annotation['rect']
-            rect_x0, rect_y0, rect_x1, rect_y1 = rect.x0, rect.y0, rect.x1, rect.y1
-            
-            # Check if the field is a date field and should be converted
-            date_fields = ['rfq_date', 'due_date', 'requested_delivery_date']
-            field_name = annotation.get('field', '')
-            standardized_date = None
-            
-            if field_name in date_fields and annotation.get('text'):
-                # Use standardized_date if it's already in the annotation
-                if 'standardized_date' in annotation and annotation['standardized_date']:
-                    standardized_date = annotation['standardized_date']
-                else:
-                    # Try to convert the date
-                    standardized_date = standardize_date(annotation.get('text', ''))
+        # Single inserts share the batched path; inside begin()/commit() they
+        # join the caller's transaction instead of committing on their own
+        annotation_ids = self.add_annotations_bulk(file_path, [annotation])
+        return annotation_ids[0] if annotation_ids else None
+    
+    def add_annotations_bulk(self, file_path, annotations):
+        """
+        Add several annotations for a file in a single transaction.
+        
+        All rows are inserted with one executemany call and committed once,
+        instead of paying a commit per annotation.
+        
+        Args:
+            file_path (str): Path to the PDF file
+            annotations (list): List of annotation dictionaries
             
-            # Check for multi-page annotation data
-            is_multipage = 1 if annotation.get('is_multipage', False) else 0
-            multipage_position = annotation.get('multipage_position', None)
-            multipage_type = annotation.get('multipage_type', '')
-            group_id = annotation.get('group_id', '')
+        Returns:
+            list: IDs of the new annotations in insertion order, or an empty
+                  list if nothing was inserted
+        """
+        if not annotations:
+            return []
+        
+        # Join the caller's transaction if begin() was already called
+        owns_transaction = not self.conn.in_transaction
+        
+        try:
+            # Extract just the filename (not the full path) once for the batch
+            file_name = _basename(file_path)
+            params = [self._annotation_params(file_name, annot) for annot in annotations]
             
-            # Insert into annotations table
-            self.cursor.execute('''
-            INSERT INTO annotations (
-                file_name, page_num, rect_x0, rect_y0, rect_x1, rect_y1,
-                annotation_text, annotation_type, field_name, line_item_number, standardized_date,
-                is_multipage, multipage_position, multipage_type, group_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                file_name,
-                annotation['page'],
-                rect_x0, rect_y0, rect_x1, rect_y1,
-                annotation.get('text', ''),
-                annotation.get('type', ''),
-                field_name,
-                annotation.get('line_item_number', ''),
-                standardized_date,
-                is_multipage,
-                multipage_position,
-                multipage_type,
-                group_id
-            ))
+            if owns_transaction:
+                self.begin()
+            self.conn.executemany(self._SQL_INSERT, params)
             
-            annotation_id = self.cursor.lastrowid
-            self.conn.commit()
-            return annotation_id
+            # Rows inserted by a single writer in one transaction get consecutive ids
+            last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            if owns_transaction:
+                self.commit()
+            return list(range(last_id - len(params) + 1, last_id + 1))
             
         except sqlite3.Error as e:
-            print(f"Error adding annotation: {str(e)}")
-            return None
+            logger.error("Error adding annotations: %s", e)
+            if owns_transaction:
+                self.rollback()  # Rollback on error
+            return []
     
     def get_annotations_for_file(self, file_path):
         """
@@ -142,52 +382,47 @@ class AnnotationDB:
         """
         try:
             # Extract just the filename (not the full path)
-            file_name = os.path.basename(file_path)
+            file_name = _basename(file_path)
             
-            self.cursor.execute('''
-            SELECT id, page_num, rect_x0, rect_y0, rect_x1, rect_y1,
-                annotation_text, annotation_type, field_name, line_item_number,
-                standardized_date, file_name, is_multipage, multipage_position, multipage_type, group_id
-            FROM annotations
-            WHERE file_name = ?
-            ORDER BY group_id, multipage_position, id
-            ''', (file_name,))
+            cursor = self.conn.execute(self._SQL_SELECT_BY_FILE, (file_name,))
             
             annotations = []
-            for row in self.cursor.fetchall():
-                annotation = {
-                    'id': row[0],
-                    'page': row[1],
-                    'rect': (row[2], row[3], row[4], row[5]),
-                    'rect_str': f"({row[2]:.2f}, {row[3]:.2f}, {row[4]:.2f}, {row[5]:.2f})",
-                    'text': row[6],
-                    'type': row[7],
-                    'field': row[8],
-                    'line_item_number': row[9],
-                    'file_name': row[11]
-                }
-                
-                # If this is a date field and we have a standardized date
-                if row[10] is not None:
-                    annotation['standardized_date'] = row[10]
+            while True:
+                # Fetch in blocks rather than materializing the whole result set
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
                 
-                # Add multi-page annotation data
-                if row[12] == 1:  # is_multipage
-                    annotation['is_multipage'] = True
-                    annotation['multipage_position'] = row[13]  # multipage_position
-                    annotation['multipage_type'] = row[14]      # multipage_type
-                    annotation['group_id'] = row[15]            # group_id
-                
-                annotations.append(annotation)
+                for row in rows:
+                    # rect_str is left to callers that need it
+                    annotation = {
+                        'id': row['id'],
+                        'page': row['page_num'],
+                        'rect': _unpack_rect(row['rect']),
+                        'text': row['annotation_text'],
+                        'type': row['annotation_type'],
+                        'field': row['field_name'],
+                        'line_item_number': row['line_item_number'],
+                        'file_name': row['file_name']
+                    }
+                    
+                    # If this is a date field and we have a standardized date
+                    if row['standardized_date'] is not None:
+                        annotation['standardized_date'] = row['standardized_date']
+                    
+                    # Add multi-page annotation data
+                    if row['is_multipage'] == 1:
+                        annotation['is_multipage'] = True
+                        annotation['multipage_position'] = row['multipage_position']
+                        annotation['multipage_type'] = row['multipage_type']
+                        annotation['group_id'] = row['group_id']
+                    
+                    annotations.append(annotation)
             
             return annotations
             
         except sqlite3.Error as e:
-            print(f"Error retrieving annotations: {str(e)}")
-            return []
-            
-        except sqlite3.Error as e:
-            print(f"Error retrieving annotations: {str(e)}")
+            logger.error("Error retrieving annotations: %s", e)
             return []
     
     def remove_annotation(self, annotation_id):
@@ -201,28 +436,20 @@ class AnnotationDB:
             bool: True if successful, False otherwise
         """
         try:
-            # Check if annotation exists before deleting
-            self.cursor.execute('SELECT id FROM annotations WHERE id = ?', (annotation_id,))
-            if not self.cursor.fetchone():
-                print(f"Warning: Annotation ID {annotation_id} not found in database")
-                return False
-                
-            # Perform the deletion
-            self.cursor.execute('DELETE FROM annotations WHERE id = ?', (annotation_id,))
-            rows_affected = self.cursor.rowcount
-            self.conn.commit()
+            # Perform the deletion; rowcount tells us whether the ID existed
+            rows_affected = self.conn.execute(self._SQL_DELETE, (annotation_id,)).rowcount
             
             # Verify deletion
             if rows_affected > 0:
-                print(f"Successfully deleted annotation ID {annotation_id} from database")
+                logger.debug("Deleted annotation ID %s from database", annotation_id)
+                self._deletes_since_compact += 1
                 return True
             else:
-                print(f"No rows affected when deleting annotation ID {annotation_id}")
+                logger.warning("Annotation ID %s not found in database", annotation_id)
                 return False
                 
         except sqlite3.Error as e:
-            print(f"Error removing annotation: {str(e)}")
-            self.conn.rollback()  # Rollback on error
+            logger.error("Error removing annotation: %s", e)
             return False
     
     def export_annotations_to_csv(self, file_path, output_path):
@@ -238,70 +465,88 @@ class AnnotationDB:
         """
         try:
             # Get annotations directly from the database to ensure we have the most current data
-            file_name = os.path.basename(file_path)
+            file_name = _basename(file_path)
             
-            self.cursor.execute('''
-            SELECT id, page_num, rect_x0, rect_y0, rect_x1, rect_y1,
-                annotation_text, annotation_type, field_name, line_item_number,
-                standardized_date, file_name, is_multipage, multipage_position, multipage_type, group_id
-            FROM annotations
-            WHERE file_name = ?
-            ORDER BY field_name, line_item_number, group_id, multipage_position, id
-            ''', (file_name,))
-            
-            rows = self.cursor.fetchall()
+            rows = self.conn.execute(self._SQL_EXPORT_BY_FILE, (file_name,))
+            first_row = next(rows, None)
             
-            if not rows:
-                print(f"No annotations found in database for {file_name}")
+            if first_row is None:
+                logger.warning("No annotations found in database for %s", file_name)
                 return False
             
             # Make sure the export directory exists
             os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
             
-            with open(output_path, 'w', newline='') as csvfile:
-                fieldnames = [
-                    'id', 'file_name', 'page', 'type', 'field', 'line_item_number', 
-                    'rect_x0', 'rect_y0', 'rect_x1', 'rect_y1',
-                    'text', 'standardized_date', 
-                    'is_multipage', 'multipage_position', 'multipage_type', 'multipage_group'
-                ]
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for row in rows:
-                    is_multipage = row[12] == 1
-                    multipage_position = row[13]
-                    multipage_type = row[14]
-                    group_id = row[15]
-                    
-                    row_dict = {
-                        'id': row[0],
-                        'file_name': row[11],
-                        'page': row[1] + 1,  # +1 for human-readable page numbers
-                        'type': row[7],
-                        'field': row[8],
-                        'line_item_number': row[9],
-                        'rect_x0': row[2],
-                        'rect_y0': row[3],
-                        'rect_x1': row[4],
-                        'rect_y1': row[5],
-                        'text': row[6],
-                        'standardized_date': row[10] if row[10] else '',
-                        'is_multipage': 1 if is_multipage else 0,
-                        'multipage_position': multipage_position if multipage_position is not None else '',
-                        'multipage_type': multipage_type if multipage_type else '',
-                        'multipage_group': group_id if group_id else ''
-                    }
-                    writer.writerow(row_dict)
+            exported = 0
+            
+            def export_rows():
+                """Yield CSV rows in header order straight from the cursor."""
+                nonlocal exported
+                for row in itertools.chain((first_row,), rows):
+                    exported += 1
+                    yield (
+                        row[0],
+                        row[8],
+                        row[1],
+                        row[4],
+                        row[5],
+                        row[6],
+                        *_unpack_rect(row[2]),
+                        row[3],
+                        row[7] or '',
+                        1 if row[9] == 1 else 0,
+                        row[10] if row[10] is not None else '',
+                        row[11] or '',
+                        row[12] or ''
+                    )
+            
+            # 1 MB write buffer so large exports hit the disk in few writes
+            with open(output_path, 'w', newline='', buffering=1 << 20) as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(self._CSV_FIELDNAMES)
+                writer.writerows(export_rows())
                 
-                print(f"Successfully exported {len(rows)} annotations to {output_path}")
+                logger.info("Exported %d annotations to %s", exported, output_path)
                 return True
                 
         except Exception as e:
-            print(f"Error exporting to CSV: {str(e)}")
+            logger.error("Error exporting to CSV: %s", e)
+            return False
+    
+    def compact(self):
+        """
+        Return pages freed by deleted annotations to the filesystem.
+        
+        Not available inside begin()/commit(), since executescript would
+        commit the open transaction.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self.conn.in_transaction:
+            logger.warning("Not compacting database while a transaction is open")
+            return False
+        
+        try:
+            # incremental_vacuum frees one page per step and execute() only
+            # steps it once; executescript runs it to completion
+            self.conn.executescript("PRAGMA incremental_vacuum;")
+            self._deletes_since_compact = 0
+            return True
+        except sqlite3.Error as e:
+            logger.warning("Error compacting database: %s", e)
             return False
     
     def close(self):
         """Close the database connection."""
-        if self.conn:
+        if self.conn and self.read_only:
+            self.conn.close()
+        elif self.conn:
+            if self._deletes_since_compact >= self._COMPACT_AFTER_DELETES:
+                self.compact()
+            try:
+                # Let SQLite refresh query planner statistics if needed
+                self.conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning("Error optimizing database: %s", e)
             self.conn.close()
@@ -1,18 +1,179 @@
 """Data panel for displaying extracted data and annotations with collapsible groups."""
 
-from PySide6.QtWidgets import (QScrollArea, QWidget, QVBoxLayout, QLabel, QTableWidget,
-                              QTableWidgetItem, QPushButton, QHeaderView, QFrame,
-                              QHBoxLayout, QToolButton, QSizePolicy)
-from PySide6.QtCore import Qt, Signal, QSize
-from PySide6.QtGui import QColor, QIcon, QFont
+from PySide6.QtWidgets import (QScrollArea, QWidget, QVBoxLayout, QLabel, QTableView,
+                              QPushButton, QHeaderView,
+                              QSizePolicy, QStyledItemDelegate, QStyleOptionButton, QStyle,
+                              QApplication, QAbstractItemView)
+from PySide6.QtCore import (Qt, Signal, QSize, QAbstractTableModel, QModelIndex, QRect,
+                            QPoint, QEvent, QTimer)
+from PySide6.QtGui import QColor, QIcon, QFont, QFontMetrics, QPainter, QPalette, QPixmap
+from collections import defaultdict
+from functools import partial
 
 
 from ..config import DATE_FIELDS
 from ..utils.date_utils import standardize_date
 
+# Longest annotation text shown in a table cell
+MAX_DISPLAY_LENGTH = 50
+
+# Light blue background that marks multi-page annotations
+MULTIPAGE_BACKGROUND = QColor(240, 240, 255)
+
+def _truncate(text):
+    """Shorten text to MAX_DISPLAY_LENGTH characters, ending with "..." when cut."""
+    if len(text) <= MAX_DISPLAY_LENGTH:
+        return text
+    return text[:MAX_DISPLAY_LENGTH - 3] + "..."
+
+def _line_item_sort_key(line_num):
+    """Sort numeric line item numbers by value, followed by the others alphabetically."""
+    return (0, int(line_num)) if line_num.isdigit() else (1, line_num)
+
+class SectionHeader(QWidget):
+    """Header of a CollapsibleSection: arrow, title and count badge painted in one pass."""
+    
+    # Emitted when the header is clicked
+    clicked = Signal()
+    
+    BACKGROUND_COLOR = QColor(0xf0, 0xf0, 0xf0)
+    BORDER_COLOR = QColor(0xc0, 0xc0, 0xc0)
+    BADGE_COLOR = QColor(0xe0, 0xe0, 0xe0)
+    
+    # Spacing in pixels, matching the layout the header used to have
+    MARGIN_X = 5
+    MARGIN_Y = 2
+    SPACING = 6
+    BADGE_PADDING_X = 8
+    BADGE_PADDING_Y = 2
+    BADGE_RADIUS = 10
+    
+    # Shared fonts, created with the first header since QFont needs a QGuiApplication
+    _title_font = None
+    _arrow_font = None
+    
+    def __init__(self, title, parent=None):
+        """
+        Initialize the section header.
+        
+        Args:
+            title (str): Title text
+            parent (QWidget, optional): Parent widget
+        """
+        super().__init__(parent)
+        
+        if SectionHeader._title_font is None:
+            SectionHeader._title_font = QFont('Arial', 10, QFont.Bold)
+            SectionHeader._arrow_font = QFont('Arial', 9)
+        
+        self._title = title
+        self._badge_text = "0"
+        self._expanded = False
+        
+        self.setCursor(Qt.PointingHandCursor)
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+    
+    def setTitle(self, title):
+        """Update the title text."""
+        self._title = title
+        self.update()
+    
+    def setBadgeCount(self, count):
+        """Update the number shown in the badge."""
+        self._badge_text = str(count)
+        self.update()
+    
+    def setExpanded(self, expanded):
+        """Show the arrow for the expanded (▼) or collapsed (►) state."""
+        if expanded != self._expanded:
+            self._expanded = expanded
+            self.update()
+    
+    def _arrowWidth(self):
+        """Width reserved for the arrow, the same for both states so the title never shifts."""
+        metrics = QFontMetrics(self._arrow_font)
+        return max(metrics.horizontalAdvance("▼"), metrics.horizontalAdvance("►"))
+    
+    def _badgeSize(self):
+        """Size of the badge pill for the current count."""
+        metrics = self.fontMetrics()
+        return QSize(metrics.horizontalAdvance(self._badge_text) + 2 * self.BADGE_PADDING_X,
+                     metrics.height() + 2 * self.BADGE_PADDING_Y)
+    
+    def sizeHint(self):
+        """Preferred size: everything on one line plus margins and a 1px border."""
+        title_metrics = QFontMetrics(self._title_font)
+        badge_size = self._badgeSize()
+        content_height = max(title_metrics.height(), QFontMetrics(self._arrow_font).height(), badge_size.height())
+        content_width = (self._arrowWidth() + self.SPACING + title_metrics.horizontalAdvance(self._title)
+                         + self.SPACING + badge_size.width())
+        return QSize(content_width + 2 * (self.MARGIN_X + 1), content_height + 2 * (self.MARGIN_Y + 1))
+    
+    def paintEvent(self, event):
+        """Paint the background, arrow, title and badge."""
+        painter = QPainter(self)
+        rect = self.rect()
+        
+        # Background and border
+        painter.fillRect(rect, self.BACKGROUND_COLOR)
+        painter.setPen(self.BORDER_COLOR)
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+        
+        content = rect.adjusted(self.MARGIN_X + 1, self.MARGIN_Y + 1, -self.MARGIN_X - 1, -self.MARGIN_Y - 1)
+        text_color = self.palette().color(QPalette.WindowText)
+        
+        # Arrow on the left
+        arrow_width = self._arrowWidth()
+        painter.setPen(text_color)
+        painter.setFont(self._arrow_font)
+        painter.drawText(QRect(content.left(), content.top(), arrow_width, content.height()),
+                         Qt.AlignCenter, "▼" if self._expanded else "►")
+        
+        # Badge pill on the right
+        badge_size = self._badgeSize()
+        badge_height = min(badge_size.height(), content.height())
+        badge_rect = QRect(content.right() + 1 - badge_size.width(),
+                           content.top() + (content.height() - badge_height) // 2,
+                           badge_size.width(), badge_height)
+        radius = min(self.BADGE_RADIUS, badge_height / 2)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.BADGE_COLOR)
+        painter.drawRoundedRect(badge_rect, radius, radius)
+        painter.setPen(text_color)
+        painter.setFont(self.font())
+        painter.drawText(badge_rect, Qt.AlignCenter, self._badge_text)
+        
+        # Title in between, elided if the panel is narrow
+        title_left = content.left() + arrow_width + self.SPACING
+        title_rect = QRect(title_left, content.top(),
+                           max(0, badge_rect.left() - self.SPACING - title_left), content.height())
+        title = QFontMetrics(self._title_font).elidedText(self._title, Qt.ElideRight, title_rect.width())
+        painter.setFont(self._title_font)
+        painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter, title)
+        painter.end()
+    
+    def mousePressEvent(self, event):
+        """Report a click anywhere on the header."""
+        self.clicked.emit()
+        event.accept()
+
+
 class CollapsibleSection(QWidget):
     """A collapsible section widget that can be expanded or collapsed."""
     
+    # Emitted with the new expanded state when the user toggles the section
+    toggled = Signal(bool)
+    
+    # Style sheet shared by every section
+    SECTION_STYLE = """
+            CollapsibleSection {
+                border: 1px solid #c0c0c0;
+                border-radius: 3px;
+                margin-bottom: 3px;
+            }
+        """
+    
     def __init__(self, title, parent=None):
         """
         Initialize the collapsible section.
@@ -28,45 +189,9 @@ class CollapsibleSection(QWidget):
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(0)
         
-        # Header frame
-        self.header_frame = QFrame()
-        self.header_frame.setFrameShape(QFrame.StyledPanel)
-        self.header_frame.setFrameShadow(QFrame.Raised)
-        self.header_frame.setStyleSheet("background-color: #f0f0f0;")
-        self.header_frame.setCursor(Qt.PointingHandCursor)
-        
-        # Header layout - make it more compact
-        self.header_layout = QHBoxLayout(self.header_frame)
-        self.header_layout.setContentsMargins(5, 2, 5, 2)
-        
-        # Toggle button for expand/collapse
-        self.toggle_button = QToolButton()
-        self.toggle_button.setStyleSheet("QToolButton { border: none; }")
-        self.toggle_button.setIconSize(QSize(16, 16))
-        # Set arrows for expand/collapse (using text as fallback)
-        self.toggle_button.setText("►")
-        self.toggle_button.setFont(QFont('Arial', 9))
-        self.toggle_button.setToolButtonStyle(Qt.ToolButtonTextOnly)
-        self.toggle_button.clicked.connect(self.toggle_content)
-        
-        # Title label
-        self.title_label = QLabel(title)
-        self.title_label.setFont(QFont('Arial', 10, QFont.Bold))
-        
-        # Badge label for item count
-        self.badge_label = QLabel("0")
-        self.badge_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        self.badge_label.setStyleSheet("""
-            padding: 2px 8px;
-            background-color: #e0e0e0;
-            border-radius: 10px;
-        """)
-        
-        # Add widgets to header layout
-        self.header_layout.addWidget(self.toggle_button)
-        self.header_layout.addWidget(self.title_label)
-        self.header_layout.addStretch()
-        self.header_layout.addWidget(self.badge_label)
+        # Header with arrow, title and count badge; clicking it toggles the section
+        self.header = SectionHeader(title)
+        self.header.clicked.connect(self.toggle_content)
         
         # Content widget
         self.content = QWidget()
@@ -76,42 +201,54 @@ class CollapsibleSection(QWidget):
         self.content_layout.setSpacing(0)  # No spacing
         self.content.setVisible(False)  # Initially collapsed
         
+        # Fills the content on first expand; see set_content_loader
+        self._content_loader = None
+        
         # Add widgets to main layout
-        self.main_layout.addWidget(self.header_frame)
+        self.main_layout.addWidget(self.header)
         self.main_layout.addWidget(self.content)
         
-        # Connect header click to toggle
-        self.header_frame.mousePressEvent = self.header_clicked
-        
         # Styling
-        self.setStyleSheet("""
-            CollapsibleSection {
-                border: 1px solid #c0c0c0;
-                border-radius: 3px;
-                margin-bottom: 3px;
-            }
-        """)
+        self.setStyleSheet(self.SECTION_STYLE)
         
         # Size policy to make the widget wrap its content tightly
         self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
     
-    def header_clicked(self, event):
-        """Handle click on the header area."""
-        self.toggle_content()
-    
     def toggle_content(self):
         """Toggle the visibility of the content area."""
-        self.content.setVisible(not self.content.isVisible())
-        
-        # Update toggle button text/icon
         if self.content.isVisible():
-            self.toggle_button.setText("▼")
+            self.collapse()
         else:
-            self.toggle_button.setText("►")
+            self.expand()
+        self.toggled.emit(self.content.isVisible())
+    
+    def set_content_loader(self, loader):
+        """
+        Set a callable that fills the content the next time it is shown.
+        
+        Runs immediately if the section is already expanded, so collapsed
+        sections never pay for filling content nobody looks at.
+        
+        Args:
+            loader (callable or None): Function taking no arguments, or None to drop a pending one
+        """
+        self._content_loader = loader
+        if loader is not None and self.content.isVisible():
+            self._run_content_loader()
+    
+    def _run_content_loader(self):
+        """Run and clear the pending content loader, if any."""
+        loader, self._content_loader = self._content_loader, None
+        if loader is not None:
+            loader()
+    
+    def set_title(self, title):
+        """Update the section title."""
+        self.header.setTitle(title)
     
     def set_badge_count(self, count):
         """Update the badge counter."""
-        self.badge_label.setText(str(count))
+        self.header.setBadgeCount(count)
     
     def add_widget(self, widget):
         """Add a widget to the content area."""
@@ -119,13 +256,255 @@ class CollapsibleSection(QWidget):
     
     def expand(self):
         """Expand the section to show content."""
+        self._run_content_loader()
         self.content.setVisible(True)
-        self.toggle_button.setText("▼")
+        self.header.setExpanded(True)
     
     def collapse(self):
         """Collapse the section to hide content."""
         self.content.setVisible(False)
-        self.toggle_button.setText("►")
+        self.header.setExpanded(False)
+
+
+class AnnotationTableModel(QAbstractTableModel):
+    """Table model exposing a list of annotations as Field / Text / Delete rows."""
+    
+    HEADERS = ("Field", "Text", "Delete")
+    DELETE_COLUMN = 2
+    
+    def __init__(self, parent=None):
+        """
+        Initialize the model.
+        
+        Args:
+            parent (QObject, optional): Parent object
+        """
+        super().__init__(parent)
+        self._rows = []  # (annotation index, annotation dict) tuples
+        self._deletable = False
+        self._display_texts = {}  # Formatted text column by row, filled as rows are painted
+    
+    def setAnnotations(self, rows, deletable=False):
+        """
+        Replace the model contents.
+        
+        Rows are compared by position with the current ones, so views only
+        hear about the rows that changed and the rows added or removed at the
+        end. Filling or emptying the model, or changing deletable, is a single reset.
+        
+        Args:
+            rows (list): (annotation index, annotation dict) tuples
+            deletable (bool): Whether rows show a delete button
+        """
+        old_rows = self._rows
+        new_rows = list(rows)
+        if not old_rows or not new_rows or deletable != self._deletable:
+            self.beginResetModel()
+            self._rows = new_rows
+            self._deletable = deletable
+            self._display_texts.clear()
+            self.endResetModel()
+            return
+        
+        old_count = len(old_rows)
+        new_count = len(new_rows)
+        changed = [row for row in range(min(old_count, new_count))
+                   if self._rowKey(old_rows[row]) != self._rowKey(new_rows[row])]
+        
+        # Forget formatted text of changed rows and of rows past the new end
+        for row in changed:
+            self._display_texts.pop(row, None)
+        for row in range(new_count, old_count):
+            self._display_texts.pop(row, None)
+        
+        if new_count < old_count:
+            self.beginRemoveRows(QModelIndex(), new_count, old_count - 1)
+            self._rows = new_rows
+            self.endRemoveRows()
+        elif new_count > old_count:
+            self.beginInsertRows(QModelIndex(), old_count, new_count - 1)
+            self._rows = new_rows
+            self.endInsertRows()
+        else:
+            self._rows = new_rows
+        
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 0),
+                                  self.index(changed[-1], len(self.HEADERS) - 1))
+    
+    @staticmethod
+    def _rowKey(row):
+        """Values a row displays, used to detect rows that need repainting."""
+        annot = row[1]
+        return (annot.get('field'), annot.get('text'), annot.get('standardized_date'),
+                annot.get('is_multipage'))
+    
+    def annotationIndex(self, row):
+        """
+        Get the index into the main annotations list for a table row.
+        
+        Args:
+            row (int): Table row
+        
+        Returns:
+            int or None: Annotation index, or None if the row is out of range
+        """
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+    
+    def annotationId(self, row):
+        """
+        Get the database id of the annotation shown in a table row.
+        
+        Args:
+            row (int): Table row
+        
+        Returns:
+            int or None: Database id, or None if the row is out of range or not saved yet
+        """
+        if 0 <= row < len(self._rows):
+            return self._rows[row][1].get('id')
+        return None
+    
+    def rowCount(self, parent=QModelIndex()):
+        """Return the number of annotations (no children for valid parents)."""
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        """Return the number of columns."""
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Return the column titles."""
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Return cell data. Display text is only formatted when Qt asks for it,
+        so rows that are never painted are never formatted.
+        """
+        if not index.isValid():
+            return None
+        
+        annot = self._rows[index.row()][1]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return annot.get('field', '')
+            if column == 1:
+                text = self._display_texts.get(index.row())
+                if text is None:
+                    text = self._display_texts[index.row()] = self._displayText(annot)
+                return text
+            if column == self.DELETE_COLUMN and self._deletable:
+                return "[x]"
+        elif role == Qt.BackgroundRole:
+            # Make multi-page annotations visually distinct
+            if column == 1 and annot.get('is_multipage', False):
+                return MULTIPAGE_BACKGROUND
+        return None
+    
+    @staticmethod
+    def _displayText(annot):
+        """Text content (with date formatting if applicable), truncated to 50 characters."""
+        text = annot['text']
+        
+        if annot.get('field') in DATE_FIELDS:
+            # Dates were standardized by the panel before the rows were set
+            std_date = annot.get('standardized_date')
+            if std_date:
+                return _truncate(f"{text} → {std_date}")
+        
+        return _truncate(text)
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Paints a "[x]" push button in a cell and reports clicks on it, without a widget per row."""
+    
+    # Emitted with the model index of the clicked cell
+    clicked = Signal(QModelIndex)
+    
+    BUTTON_SIZE = QSize(30, 20)
+    
+    def __init__(self, parent=None):
+        """
+        Initialize the delegate.
+        
+        Args:
+            parent (QObject, optional): Parent object
+        """
+        super().__init__(parent)
+        # Button images drawn once, keyed by (style name, device pixel ratio, text)
+        self._button_pixmaps = {}
+    
+    def _buttonRect(self, cell_rect):
+        """Center the button inside the cell."""
+        rect = QRect(QPoint(0, 0), self.BUTTON_SIZE)
+        rect.moveCenter(cell_rect.center())
+        return rect
+    
+    def paint(self, painter, option, index):
+        """Draw the button for cells that have one."""
+        text = index.data(Qt.DisplayRole)
+        if not text:
+            super().paint(painter, option, index)
+            return
+        
+        style = option.widget.style() if option.widget else QApplication.style()
+        painter.drawPixmap(self._buttonRect(option.rect).topLeft(),
+                           self._buttonPixmap(style, painter.device().devicePixelRatioF(), text, option.widget))
+    
+    def _buttonPixmap(self, style, ratio, text, widget):
+        """
+        Get the button image, drawing it with the style only the first time.
+        
+        Every row shows the same button, so it is rendered once and blitted
+        instead of going through QStyle.drawControl for each painted cell.
+        
+        Args:
+            style (QStyle): Style that draws the button
+            ratio (float): Device pixel ratio of the target
+            text (str): Button text
+            widget (QWidget): Widget being painted, passed on to the style
+            
+        Returns:
+            QPixmap: Transparent image of the button at BUTTON_SIZE
+        """
+        key = (style.name(), ratio, text)
+        pixmap = self._button_pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(self.BUTTON_SIZE * ratio)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            
+            button = QStyleOptionButton()
+            button.rect = QRect(QPoint(0, 0), self.BUTTON_SIZE)
+            button.text = text
+            button.state = QStyle.State_Enabled
+            pixmap_painter = QPainter(pixmap)
+            style.drawControl(QStyle.CE_PushButton, button, pixmap_painter, widget)
+            pixmap_painter.end()
+            
+            self._button_pixmaps[key] = pixmap
+        return pixmap
+    
+    def editorEvent(self, event, model, option, index):
+        """Emit clicked when a mouse release lands on the button."""
+        if (event.type() == QEvent.MouseButtonRelease
+                and event.button() == Qt.LeftButton
+                and index.data(Qt.DisplayRole)
+                and self._buttonRect(option.rect).contains(event.position().toPoint())):
+            self.clicked.emit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
+    
+    def sizeHint(self, option, index):
+        """Leave a little room around the button."""
+        return self.BUTTON_SIZE + QSize(4, 2)
 
 
 class DataPanel(QScrollArea):
@@ -134,6 +513,12 @@ class DataPanel(QScrollArea):
     # Signal for index of selected annotation
     annotationSelected = Signal(int)
     
+    # Compact row height of the annotation tables
+    ROW_HEIGHT = 22
+    
+    # Delay in ms used to coalesce bursts of annotation list updates
+    UPDATE_DELAY_MS = 30
+    
     def __init__(self, parent=None):
         """
         Initialize the data panel.
@@ -179,8 +564,21 @@ class DataPanel(QScrollArea):
         self.line_items_layout.setSpacing(2)  # Compact spacing
         self.data_layout.addWidget(self.line_items_container)
         
-        # Map to store line item sections by line item number
+        # Map to store line item sections (and their tables) by line item number
         self.line_item_sections = {}
+        self.line_item_tables = {}
+        
+        # Hidden (section, table) pairs kept for reuse instead of being rebuilt
+        self._section_pool = []
+        
+        # Sections the user collapsed ('meta' or a line item number); they stay
+        # collapsed across updates and their tables are only filled when expanded
+        self._collapsed_sections = set()
+        
+        # Signatures of what is currently shown, so unchanged updates can be skipped:
+        # one for the whole list and one per section ('meta' or a line item number)
+        self._last_annotations_signature = None
+        self._section_signatures = {}
         
         # Export button
         self.export_button = QPushButton("Export Annotations to CSV")
@@ -192,41 +590,115 @@ class DataPanel(QScrollArea):
         # Set as the panel's widget
         self.setWidget(self.data_content)
         
-        # Store mapping between annotation index and its location (section, table, row)
-        self.annotation_index_map = {}
+        # Callback for delete buttons, set by updateAnnotationsList
+        self.on_delete_callback = None
+        
+        # Table header height, delete column width and field name widths, measured
+        # once and reset when the font or style changes
+        self._header_height = None
+        self._delete_column_width = None
+        self._field_widths = {}
+        
+        # Arguments of the latest updateAnnotationsList call, applied when the timer fires
+        self._pending_update = None
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(self.UPDATE_DELAY_MS)
+        self._update_timer.timeout.connect(self._flushPendingUpdate)
         
     def create_table(self, headers):
-        """Create a table with the given headers."""
-        table = QTableWidget()
-        table.setColumnCount(len(headers))
-        table.setHorizontalHeaderLabels(headers)
+        """Create an annotation table view with its own model."""
+        table = QTableView()
+        model = AnnotationTableModel(table)
+        table.setModel(model)
         
-        # Set last column as fixed width for delete button
-        if "Delete" in headers:
-            delete_col = headers.index("Delete")
-            table.horizontalHeader().setSectionResizeMode(delete_col, QHeaderView.ResizeToContents)
+        # Read-only, single-row selection and plain single-line cells
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionMode(QAbstractItemView.SingleSelection)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setWordWrap(False)
+        table.horizontalHeader().setHighlightSections(False)
         
-        # Set stretch for the text column
-        text_col = headers.index("Text") if "Text" in headers else 1
-        table.horizontalHeader().setSectionResizeMode(text_col, QHeaderView.Stretch)
+        # Draw delete buttons instead of creating a QPushButton per row
+        delegate = DeleteButtonDelegate(table)
+        delegate.clicked.connect(self.onDeleteClicked)
+        table.setItemDelegateForColumn(AnnotationTableModel.DELETE_COLUMN, delegate)
         
-        # Set other columns to resize to contents
-        for i in range(len(headers)):
-            if i != text_col and (i != delete_col if "Delete" in headers else True):
-                table.horizontalHeader().setSectionResizeMode(i, QHeaderView.ResizeToContents)
+        # Fixed column widths, so Qt never measures every cell when the rows change;
+        # the field column is sized from its field names in _fillTable and the text
+        # column takes the remaining space
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Fixed)
+        header.resizeSection(0, self._fieldColumnWidth(()))
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(AnnotationTableModel.DELETE_COLUMN, QHeaderView.Fixed)
+        header.resizeSection(AnnotationTableModel.DELETE_COLUMN, self._deleteColumnWidth())
         
         # Connect cell clicked signal
-        table.cellClicked.connect(self.onTableCellClicked)
+        table.clicked.connect(self.onTableClicked)
         
         # Adjust row height to be more compact
         table.verticalHeader().setVisible(False)  # Hide row numbers
-        table.verticalHeader().setDefaultSectionSize(22)  # Compact row height
+        table.verticalHeader().setDefaultSectionSize(self.ROW_HEIGHT)  # Compact row height
         
         # Make table size to content
         table.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Minimum)
         
         return table
     
+    def _textWidth(self, text):
+        """Width of a cell or header text including cell padding, memoized per text."""
+        width = self._field_widths.get(text)
+        if width is None:
+            width = self.fontMetrics().horizontalAdvance(text) + 12
+            self._field_widths[text] = width
+        return width
+    
+    def _fieldColumnWidth(self, annotations):
+        """
+        Width that fits the "Field" header and the field names of the given rows.
+        
+        Only the distinct field names are measured, instead of every cell as
+        QHeaderView.ResizeToContents would.
+        
+        Args:
+            annotations (list): (annotation index, annotation dict) tuples
+            
+        Returns:
+            int: Column width in pixels
+        """
+        names = {annot.get('field', '') for _, annot in annotations}
+        names.add("Field")
+        return max(self._textWidth(name) for name in names)
+    
+    def _deleteColumnWidth(self):
+        """Width that fits the "Delete" header and the delete button."""
+        if self._delete_column_width is None:
+            self._delete_column_width = max(self._textWidth("Delete"),
+                                            DeleteButtonDelegate.BUTTON_SIZE.width() + 4)
+        return self._delete_column_width
+    
+    def fitTableHeight(self, table):
+        """
+        Size a table to show all of its rows without scrolling.
+        
+        Args:
+            table (QTableView): Table to resize
+        """
+        # All tables share the same header, so it only needs measuring once
+        if self._header_height is None:
+            self._header_height = table.horizontalHeader().height()
+        table_border = 2  # Border pixels
+        table.setFixedHeight(self._header_height + self.ROW_HEIGHT * table.model().rowCount() + table_border)
+    
+    def changeEvent(self, event):
+        """Forget the measured header height when the font or style changes."""
+        if event.type() in (QEvent.FontChange, QEvent.StyleChange):
+            self._header_height = None
+            self._delete_column_width = None
+            self._field_widths.clear()
+        super().changeEvent(event)
+    
     def updatePDFInfo(self, doc):
         """
         Update the panel with PDF information.
@@ -254,6 +726,7 @@ class DataPanel(QScrollArea):
                 
         # Update display
         self.data_label.setText(info_text)
+        self._collapsed_sections.clear()
         self.clearSelection()
         self.clearAnnotations()
     
@@ -262,21 +735,43 @@ class DataPanel(QScrollArea):
         self.selected_text_display.setText("No text selected")
     
     def clearAnnotations(self):
-        """Clear all annotations from tables and remove line item sections."""
-        # Clear metadata section if it exists
-        if self.meta_section:
-            self.data_layout.removeWidget(self.meta_section)
-            self.meta_section.deleteLater()
-            self.meta_section = None
-            self.meta_table = None
+        """Clear all annotations from tables and hide the sections for reuse."""
+        # Drop any update that was still waiting to be applied
+        self._update_timer.stop()
+        self._pending_update = None
         
-        # Clear line items
-        for section in self.line_item_sections.values():
-            self.line_items_layout.removeWidget(section)
-            section.deleteLater()
+        # Hide the metadata section if it exists; it is reused on the next update
+        self._hideMetaSection()
         
-        self.line_item_sections = {}
-        self.annotation_index_map = {}
+        # Return line item sections to the pool
+        for line_num in list(self.line_item_sections):
+            self._releaseLineItemSection(line_num)
+        
+        self._last_annotations_signature = None
+    
+    def _hideMetaSection(self):
+        """Hide and empty the metadata section, keeping it for reuse."""
+        if self.meta_section:
+            self.meta_section.hide()
+            self.meta_section.set_content_loader(None)
+            self.meta_table.model().setAnnotations([])
+        self._section_signatures.pop('meta', None)
+    
+    def _releaseLineItemSection(self, line_num):
+        """
+        Remove a line item section from the panel and return it to the pool.
+        
+        Args:
+            line_num (str): Line item number of the section
+        """
+        section = self.line_item_sections.pop(line_num)
+        table = self.line_item_tables.pop(line_num)
+        self.line_items_layout.removeWidget(section)
+        section.hide()
+        section.set_content_loader(None)
+        table.model().setAnnotations([])
+        self._section_pool.append((section, table))
+        self._section_signatures.pop(line_num, None)
     
     def updateSelectedText(self, text):
         """
@@ -289,257 +784,291 @@ class DataPanel(QScrollArea):
             self.selected_text_display.setText(text)
     
     def updateAnnotationsList(self, annotations, on_delete_callback=None):
+        """
+        Schedule an update of the annotations list.
+        
+        Calls arriving within UPDATE_DELAY_MS of each other are coalesced so
+        only the latest list is shown, and nothing is built while the panel
+        is hidden.
+        
+        Args:
+            annotations (list): List of annotation dictionaries
+            on_delete_callback (function, optional): Callback for delete button clicks,
+                                                     called with the annotation's database id
+                                                     and its index in the annotations list
+        """
+        self._pending_update = (annotations, on_delete_callback)
+        if not self._update_timer.isActive():
+            self._update_timer.start()
+    
+    def _flushPendingUpdate(self):
+        """Apply the latest scheduled update, or wait for showEvent if the panel is hidden."""
+        if self._pending_update is None or not self.isVisible():
+            return
+        annotations, on_delete_callback = self._pending_update
+        self._pending_update = None
+        self._applyAnnotationsList(annotations, on_delete_callback)
+    
+    def showEvent(self, event):
+        """Apply an update that was deferred while the panel was hidden."""
+        super().showEvent(event)
+        if self._pending_update is not None and not self._update_timer.isActive():
+            self._update_timer.start()
+    
+    def _applyAnnotationsList(self, annotations, on_delete_callback=None):
         """
         Update the annotations list with collapsible grouping.
         
         Args:
             annotations (list): List of annotation dictionaries
-            on_delete_callback (function, optional): Callback for delete button clicks
+            on_delete_callback (function, optional): Callback for delete button clicks,
+                                                     called with the annotation's database id
+                                                     and its index in the annotations list
         """
-        # Clear existing annotations
-        self.clearAnnotations()
+        self.on_delete_callback = on_delete_callback
+        deletable = on_delete_callback is not None
         
-        if not annotations:
+        # Store standardized dates on the annotations before anything reads
+        # them, so painting never changes an annotation behind the signatures
+        self._standardizeDates(annotations)
+        
+        # Nothing to do if the visible content of the list has not changed
+        signatures = [self._annotationSignature(i, annot) for i, annot in enumerate(annotations)]
+        list_signature = (deletable, tuple(signatures))
+        if list_signature == self._last_annotations_signature:
             return
-            
-        # Group annotations by type and line item number
-        meta_annotations = []
-        line_item_annotations = {}
+        self._last_annotations_signature = list_signature
         
-        for i, annot in enumerate(annotations):
-            if 'type' not in annot or 'text' not in annot:
-                continue
+        # Update with painting switched off so the panel repaints once at the end
+        self.data_content.setUpdatesEnabled(False)
+        try:
+            # Group annotations by type and line item number
+            meta_annotations = []
+            line_item_annotations = defaultdict(list)
+            
+            for i, annot in enumerate(annotations):
+                # Rows always show the text, so annotations without it are skipped;
+                # a missing type simply matches neither group
+                if 'text' not in annot:
+                    continue
                 
-            if annot.get('type') == 'meta':
-                meta_annotations.append((i, annot))
-            elif annot.get('type') == 'line_item':
-                line_num = annot.get('line_item_number', '')
-                if line_num not in line_item_annotations:
-                    line_item_annotations[line_num] = []
-                line_item_annotations[line_num].append((i, annot))
+                get = annot.get
+                annot_type = get('type')
+                if annot_type == 'meta':
+                    meta_annotations.append((i, annot))
+                elif annot_type == 'line_item':
+                    line_item_annotations[get('line_item_number', '')].append((i, annot))
+            
+            # Fill metadata section
+            self._populate_meta_section(meta_annotations, signatures, deletable)
+            
+            # Fill line item sections
+            self._populate_line_item_sections(line_item_annotations, signatures, deletable)
+        finally:
+            self.data_content.setUpdatesEnabled(True)
+    
+    @staticmethod
+    def _standardizeDates(annotations):
+        """
+        Standardize date fields that have no standardized_date yet and store the result.
+        
+        Later refreshes (and saving to the database) then use the stored
+        value instead of parsing again.
         
-        # Fill metadata section
-        self._populate_meta_section(meta_annotations, on_delete_callback)
+        Args:
+            annotations (list): List of annotation dictionaries
+        """
+        for annot in annotations:
+            if annot.get('field') in DATE_FIELDS and not annot.get('standardized_date') and annot.get('text'):
+                std_date = standardize_date(annot['text'])
+                if std_date:
+                    annot['standardized_date'] = std_date
+    
+    @staticmethod
+    def _annotationSignature(index, annot):
+        """
+        Build a comparable tuple of everything the panel shows for an annotation.
         
-        # Fill line item sections
-        self._populate_line_item_sections(line_item_annotations, on_delete_callback)
+        Args:
+            index (int): Index of the annotation in the annotations list
+            annot (dict): Annotation data
+            
+        Returns:
+            tuple: Signature that changes whenever the annotation's row would change
+        """
+        return (index, annot.get('type'), annot.get('line_item_number'), annot.get('field'),
+                annot.get('text'), annot.get('standardized_date'), annot.get('is_multipage'))
     
-    def _populate_meta_section(self, meta_annotations, on_delete_callback):
+    def _populate_meta_section(self, meta_annotations, signatures, deletable):
         """Populate the metadata section with annotation data."""
         if not meta_annotations:
-            # If there are no metadata annotations, remove the section if it exists
-            if self.meta_section:
-                self.data_layout.removeWidget(self.meta_section)
-                self.meta_section.deleteLater()
-                self.meta_section = None
-                self.meta_table = None
+            self._hideMetaSection()
             return
-            
+        
         # Create the metadata section if it doesn't exist
         if not self.meta_section:
-            self.meta_section = CollapsibleSection("Metadata")
-            self.meta_table = self.create_table(["Field", "Text", "Delete"])
-            self.meta_section.add_widget(self.meta_table)
+            self.meta_section, self.meta_table = self._createSection("Metadata")
             # Insert at position right after annotations label
             index = self.data_layout.indexOf(self.annotations_label) + 1
             self.data_layout.insertWidget(index, self.meta_section)
         else:
-            # Clear existing rows
-            self.meta_table.setRowCount(0)
+            self.meta_section.show()
         
-        for i, (index, annot) in enumerate(meta_annotations):
-            row_position = self.meta_table.rowCount()
-            self.meta_table.insertRow(row_position)
-            
-            # Field name
-            field_item = QTableWidgetItem(annot.get('field', ''))
-            self.meta_table.setItem(row_position, 0, field_item)
-            
-            # Text content (with date formatting if applicable)
-            display_text = annot['text']
-            
-            if annot.get('field') in DATE_FIELDS:
-                if 'standardized_date' in annot and annot['standardized_date']:
-                    display_text = f"{annot['text']} → {annot['standardized_date']}"
+        self._updateSection('meta', self.meta_section, self.meta_table,
+                            meta_annotations, signatures, deletable)
+    
+    def _populate_line_item_sections(self, line_item_annotations, signatures, deletable):
+        """Populate the line item sections with annotation data."""
+        # Sort line item numbers numerically if possible
+        sorted_line_items = sorted(line_item_annotations, key=_line_item_sort_key)
+        
+        # Sections for line items that are gone go back to the pool
+        for line_num in [num for num in self.line_item_sections if num not in line_item_annotations]:
+            self._releaseLineItemSection(line_num)
+        
+        for line_num in sorted_line_items:
+            # Keep the existing section for this line item, reuse a pooled one, or create one
+            if line_num in self.line_item_sections:
+                section = self.line_item_sections[line_num]
+                table = self.line_item_tables[line_num]
+            else:
+                section_title = f"Line Item #{line_num}" if line_num else "Line Item (No Number)"
+                if self._section_pool:
+                    section, table = self._section_pool.pop()
+                    section.set_title(section_title)
+                    section.show()
                 else:
-                    # Try to standardize now
-                    std_date = standardize_date(annot['text'])
-                    if std_date:
-                        display_text = f"{annot['text']} → {std_date}"
-            
-            # Truncate if too long
-            if len(display_text) > 50:
-                display_text = display_text[:47] + "..."
-                
-            text_item = QTableWidgetItem(display_text)
-            
-            # Make multi-page annotations visually distinct
-            if annot.get('is_multipage', False):
-                text_item.setBackground(QColor(240, 240, 255))  # Light blue background
+                    section, table = self._createSection(section_title)
                 
-            self.meta_table.setItem(row_position, 1, text_item)
+                # Add the section to our layout
+                self.line_items_layout.addWidget(section)
+                self.line_item_sections[line_num] = section
+                self.line_item_tables[line_num] = table
             
-            # Delete button
-            if on_delete_callback:
-                delete_button = QPushButton("[x]")
-                delete_button.setFixedWidth(30)
-                delete_button.setFixedHeight(20)  # Make button smaller
-                # Use a lambda to capture the current annotation index
-                delete_func = lambda checked, idx=index: on_delete_callback(idx)
-                delete_button.clicked.connect(delete_func)
-                self.meta_table.setCellWidget(row_position, 2, delete_button)
-            
-            # Map row to annotation index
-            self.annotation_index_map[f"meta_{row_position}"] = index
+            self._updateSection(line_num, section, table,
+                                line_item_annotations[line_num], signatures, deletable)
         
-        # Update badge count
-        self.meta_section.set_badge_count(len(meta_annotations))
+        # Put the sections back in sorted order if new line items were inserted
+        ordered = [self.line_item_sections[line_num] for line_num in sorted_line_items]
+        current = [self.line_items_layout.itemAt(i).widget() for i in range(self.line_items_layout.count())]
+        if current != ordered:
+            for section in ordered:
+                self.line_items_layout.removeWidget(section)
+                self.line_items_layout.addWidget(section)
+    
+    def _createSection(self, title):
+        """
+        Create a collapsible section holding an empty annotation table.
         
-        # Expand section if it has items
-        if len(meta_annotations) > 0:
-            self.meta_section.expand()
+        Args:
+            title (str): Section title
             
-        # Calculate exact height needed for the table
-        header_height = self.meta_table.horizontalHeader().height()
-        row_count = self.meta_table.rowCount()
-        row_height = self.meta_table.rowHeight(0)
-        table_border = 2  # Border pixels
-        total_table_height = header_height + (row_height * row_count) + table_border
-        
-        # Set the table height precisely
-        self.meta_table.setFixedHeight(total_table_height)
-        
-        # Force layout update to apply the size constraints
-        self.meta_table.updateGeometry()
-        self.meta_section.content.updateGeometry()
-        self.meta_section.updateGeometry()
+        Returns:
+            tuple: (CollapsibleSection, QTableView)
+        """
+        section = CollapsibleSection(title)
+        table = self.create_table(AnnotationTableModel.HEADERS)
+        section.add_widget(table)
+        section.toggled.connect(self.onSectionToggled)
+        return section, table
     
-    def _populate_line_item_sections(self, line_item_annotations, on_delete_callback):
-        """Populate the line item sections with annotation data."""
-        # Sort line item numbers numerically if possible
-        sorted_line_items = sorted(line_item_annotations.keys(), 
-                                 key=lambda x: int(x) if x.isdigit() else float('inf'))
+    def _updateSection(self, key, section, table, annotations, signatures, deletable):
+        """
+        Refill a section's table if its rows changed and apply its collapsed state.
         
-        for line_num in sorted_line_items:
-            # Create a section for this line item
-            section_title = f"Line Item #{line_num}" if line_num else "Line Item (No Number)"
-            section = CollapsibleSection(section_title)
-            
-            # Create a table for this line item's annotations
-            table = self.create_table(["Field", "Text", "Delete"])
-            section.add_widget(table)
+        Args:
+            key (str): 'meta' or the line item number of the section
+            section (CollapsibleSection): Section to update
+            table (QTableView): Table inside the section
+            annotations (list): (annotation index, annotation dict) tuples
+            signatures (list): Signature of every annotation, by annotation index
+            deletable (bool): Whether rows show a delete button
+        """
+        section_signature = (deletable, tuple(signatures[i] for i, _ in annotations))
+        if self._section_signatures.get(key) != section_signature:
+            self._section_signatures[key] = section_signature
             
-            # Add the section to our layout
-            self.line_items_layout.addWidget(section)
-            self.line_item_sections[line_num] = section
+            # Fill the table once the section is expanded
+            section.set_content_loader(partial(self._fillTable, table, annotations, deletable))
             
-            # Populate the table
-            annotations = line_item_annotations[line_num]
-            for i, (index, annot) in enumerate(annotations):
-                row_position = table.rowCount()
-                table.insertRow(row_position)
-                
-                # Field name
-                field_item = QTableWidgetItem(annot.get('field', ''))
-                table.setItem(row_position, 0, field_item)
-                
-                # Text content (with date formatting if applicable)
-                display_text = annot['text']
-                
-                if annot.get('field') in DATE_FIELDS:
-                    if 'standardized_date' in annot and annot['standardized_date']:
-                        display_text = f"{annot['text']} → {annot['standardized_date']}"
-                    else:
-                        # Try to standardize now
-                        std_date = standardize_date(annot['text'])
-                        if std_date:
-                            display_text = f"{annot['text']} → {std_date}"
-                
-                # Truncate if too long
-                if len(display_text) > 50:
-                    display_text = display_text[:47] + "..."
-                    
-                text_item = QTableWidgetItem(display_text)
-                
-                # Make multi-page annotations visually distinct
-                if annot.get('is_multipage', False):
-                    text_item.setBackground(QColor(240, 240, 255))  # Light blue background
-                    
-                table.setItem(row_position, 1, text_item)
-                
-                # Delete button
-                if on_delete_callback:
-                    delete_button = QPushButton("[x]")
-                    delete_button.setFixedWidth(30)
-                    delete_button.setFixedHeight(20)  # Make button smaller
-                    # Use a lambda to capture the current annotation index
-                    delete_func = lambda checked, idx=index: on_delete_callback(idx)
-                    delete_button.clicked.connect(delete_func)
-                    table.setCellWidget(row_position, 2, delete_button)
-                
-                # Map row to annotation index
-                self.annotation_index_map[f"line_{line_num}_{row_position}"] = index
-            
-            # Update badge count
+            # Badge counts are shown even while the table is still empty
             section.set_badge_count(len(annotations))
-            
-            # Expand section
+        
+        # Expand section unless the user collapsed it
+        if key in self._collapsed_sections:
+            section.collapse()
+        else:
             section.expand()
-            
-            # Calculate exact height needed for the table
-            header_height = table.horizontalHeader().height()
-            row_count = table.rowCount()
-            row_height = table.rowHeight(0)
-            table_border = 2  # Border pixels
-            total_table_height = header_height + (row_height * row_count) + table_border
-            
-            # Set table height exactly
-            table.setFixedHeight(total_table_height)
-            
-            # Force layout update to apply the size constraints
-            table.updateGeometry()
-            section.content.updateGeometry()
-            section.updateGeometry()
     
-    def onTableCellClicked(self, row, column):
+    def _fillTable(self, table, annotations, deletable):
         """
-        Handle clicks on any annotation table.
+        Load annotations into a table and size it to fit.
         
         Args:
-            row (int): Row index
-            column (int): Column index
+            table (QTableView): Table to fill
+            annotations (list): (annotation index, annotation dict) tuples
+            deletable (bool): Whether rows show a delete button
         """
-        # Ignore clicks on the delete button column (column 2)
-        if column == 2:
-            return
+        # Update the rows; the model only signals what changed
+        table.model().setAnnotations(annotations, deletable)
+        table.horizontalHeader().resizeSection(0, self._fieldColumnWidth(annotations))
         
-        # Find which table was clicked
-        sender = self.sender()
+        # Set table height exactly; setFixedHeight already updates the geometry
+        self.fitTableHeight(table)
+    
+    def onSectionToggled(self, expanded):
+        """
+        Remember which sections the user collapsed.
         
-        # Determine the annotation index based on which table was clicked
-        annotation_index = None
+        Args:
+            expanded (bool): New state of the toggled section
+        """
+        section = self.sender()
+        if section is self.meta_section:
+            key = 'meta'
+        else:
+            key = next((line_num for line_num, line_section in self.line_item_sections.items()
+                        if line_section is section), None)
+            if key is None:
+                return
         
-        if self.meta_table and sender == self.meta_table:
-            key = f"meta_{row}"
-            if key in self.annotation_index_map:
-                annotation_index = self.annotation_index_map[key]
+        if expanded:
+            self._collapsed_sections.discard(key)
         else:
-            # Find which line item table it is
-            for line_num, section in self.line_item_sections.items():
-                # Extract the table from the section
-                table = None
-                for i in range(section.content_layout.count()):
-                    widget = section.content_layout.itemAt(i).widget()
-                    if isinstance(widget, QTableWidget):
-                        table = widget
-                        break
-                
-                if table and sender == table:
-                    key = f"line_{line_num}_{row}"
-                    if key in self.annotation_index_map:
-                        annotation_index = self.annotation_index_map[key]
-                    break
+            self._collapsed_sections.add(key)
+    
+    def onTableClicked(self, model_index):
+        """
+        Handle clicks on any annotation table.
+        
+        Args:
+            model_index (QModelIndex): Index of the clicked cell
+        """
+        # Ignore clicks on the delete button column
+        if model_index.column() == AnnotationTableModel.DELETE_COLUMN:
+            return
+        
+        # Each table's model knows which annotation a row shows
+        annotation_index = model_index.model().annotationIndex(model_index.row())
         
         # Emit signal with annotation index if found
         if annotation_index is not None:
-            self.annotationSelected.emit(annotation_index)
\ No newline at end of file
+            self.annotationSelected.emit(annotation_index)
+    
+    def onDeleteClicked(self, model_index):
+        """
+        Handle clicks on a row's delete button.
+        
+        Args:
+            model_index (QModelIndex): Index of the clicked delete cell
+        """
+        if not self.on_delete_callback:
+            return
+        
+        # Ids stay valid even if the list changed since the table was built;
+        # the index is the fallback for annotations that were never saved
+        model = model_index.model()
+        annotation_id = model.annotationId(model_index.row())
+        annotation_index = model.annotationIndex(model_index.row())
+        if annotation_id is not None or annotation_index is not None:
+            self.on_delete_callback(annotation_id, annotation_index)
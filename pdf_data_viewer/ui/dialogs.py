@@ -1,7 +1,8 @@
 """Dialog boxes for the PDF Data Viewer application."""
 
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QGroupBox, QRadioButton,
-                              QButtonGroup, QComboBox, QLineEdit, QLabel, QDialogButtonBox)
+                              QButtonGroup, QComboBox, QLineEdit, QLabel, QDialogButtonBox,
+                              QStackedWidget)
 from ..config import META_FIELDS, LINE_ITEM_FIELDS
 
 class AnnotationFieldDialog(QDialog):
@@ -40,10 +41,20 @@ class AnnotationFieldDialog(QDialog):
         self.type_layout.addWidget(self.line_item_radio)
         self.type_group_box.setLayout(self.type_layout)
         
-        # Create field selection combo box
+        # Create one field combo box per annotation type, filled once; switching
+        # type only changes which one is shown
         self.field_layout = QFormLayout()
-        self.field_combo = QComboBox()
-        self.field_layout.addRow("Field:", self.field_combo)
+        self.meta_combo = QComboBox()
+        self.meta_combo.addItems(META_FIELDS)
+        self.line_item_combo = QComboBox()
+        self.line_item_combo.addItems(LINE_ITEM_FIELDS)
+        self.field_stack = QStackedWidget()
+        self.field_stack.addWidget(self.meta_combo)
+        self.field_stack.addWidget(self.line_item_combo)
+        self.field_layout.addRow("Field:", self.field_stack)
+        
+        # The combo box for the selected type
+        self.field_combo = self.meta_combo
         
         # Create line item number input (initially hidden)
         self.line_item_number_input = QLineEdit()
@@ -67,19 +78,32 @@ class AnnotationFieldDialog(QDialog):
         # Default to meta data selected
         self.meta_radio.setChecked(True)
         self.updateFieldOptions()
+    
+    def reset(self, last_line_item_number=""):
+        """
+        Restore the initial state so the dialog can be shown again.
+        
+        Args:
+            last_line_item_number (str, optional): Last used line item number
+        """
+        self.last_line_item_number = last_line_item_number
+        self.line_item_number_input.setText(last_line_item_number)
+        self.meta_combo.setCurrentIndex(0)
+        self.line_item_combo.setCurrentIndex(0)
+        self.meta_radio.setChecked(True)
+        self.updateFieldOptions()
         
     def updateFieldOptions(self):
         """Update field options based on selected type."""
-        self.field_combo.clear()
-        
         if self.meta_radio.isChecked():
-            self.field_combo.addItems(META_FIELDS)
+            self.field_combo = self.meta_combo
             self.line_item_number_label.setVisible(False)
             self.line_item_number_input.setVisible(False)
         else:
-            self.field_combo.addItems(LINE_ITEM_FIELDS)
+            self.field_combo = self.line_item_combo
             self.line_item_number_label.setVisible(True)
             self.line_item_number_input.setVisible(True)
+        self.field_stack.setCurrentWidget(self.field_combo)
             
     def getFieldInfo(self):
         """
@@ -2,24 +2,73 @@
 
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QSplitter, QToolBar,
                               QFileDialog, QMessageBox, QLabel, QSlider,
-                              QComboBox, QApplication, QDialog)
-from PySide6.QtCore import Qt, QSize
+                              QComboBox, QDialog)
+from PySide6.QtCore import Qt, QSize, QTimer, QObject, QRunnable, QThreadPool, Signal, Slot
 from PySide6.QtGui import QKeySequence, QAction
 
 import os
+import logging
 import fitz
 
-from ..config import DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT, APP_NAME, EXPORT_DIR
+from ..config import DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT, APP_NAME, EXPORT_DIR, DATE_FIELDS
 from ..database.models import AnnotationDB
 from ..core.pdf_handler import PDFDocument
 from ..core.annotation_handler import AnnotationHandler
+from ..utils.date_utils import standardize_date
 from .pdf_viewer import PDFViewer
 from .data_panel import DataPanel
 from .dialogs import AnnotationFieldDialog
 
+# Get a logger for this module
+logger = logging.getLogger(__name__)
+
+class _ExportRelay(QObject):
+    """
+    Carries the result of a background CSV export back to the UI thread.
+    
+    Created on the UI thread, so emitting `finished` from a worker is
+    delivered as a queued call there.
+    """
+    
+    # success, output path
+    finished = Signal(bool, str)
+
+
+class _ExportJob(QRunnable):
+    """Background job that exports a file's annotations to CSV."""
+    
+    def __init__(self, relay, db_path, file_path, output_path):
+        """
+        Initialize the job.
+        
+        Args:
+            relay (_ExportRelay): Relay that receives the result
+            db_path (str): Path to the SQLite database file
+            file_path (str): Path to the PDF file
+            output_path (str): Path to save the CSV file
+        """
+        super().__init__()
+        self.relay = relay
+        self.db_path = db_path
+        self.file_path = file_path
+        self.output_path = output_path
+    
+    def run(self):
+        """Run the export and report the result to the UI thread."""
+        # SQLite connections can't be shared across threads, so use our own
+        db = AnnotationDB.open_read_only(self.db_path)
+        try:
+            success = db.export_annotations_to_csv(self.file_path, self.output_path)
+        finally:
+            db.close()
+        self.relay.finished.emit(success, self.output_path)
+
 class MainWindow(QMainWindow):
     """Main window for the PDF Data Viewer application."""
     
+    # Zoom slider changes are applied to the view at most once per this many milliseconds
+    ZOOM_DELAY_MS = 50
+    
     def __init__(self):
         """Initialize the main window."""
         super().__init__()
@@ -30,6 +79,36 @@ class MainWindow(QMainWindow):
         # Initialize PDF document and annotation handlers
         self.current_file = None
         
+        # Field selection dialog, created on first use and reused afterwards
+        self._field_dialog = None
+        
+        # CSV exports run one at a time on their own pool, so they never wait
+        # behind other work queued on the global one
+        self._export_pool = QThreadPool(self)
+        self._export_pool.setMaxThreadCount(1)
+        self._export_relay = _ExportRelay()
+        self._export_relay.finished.connect(self.onExportFinished)
+        self._exporting = False
+        
+        # Annotations waiting to be saved together, e.g. the parts of a multi-page annotation
+        self._unsaved_annotations = []
+        # Pages holding highlights of each multi-page annotation still being added, by group_id
+        self._group_pages = {}
+        
+        # Pages whose highlights changed; re-rendered once on the next event loop turn
+        self._dirty_pages = set()
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._renderDirtyPages)
+        
+        # Zoom slider value waiting to be applied
+        self._pending_zoom = None
+        self._zoom_timer = QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(self.ZOOM_DELAY_MS)
+        self._zoom_timer.timeout.connect(self._applyPendingZoom)
+        
         # Set up UI
         self.initUI()
         
@@ -213,6 +292,7 @@ class MainWindow(QMainWindow):
         self.quality_selector.currentIndexChanged.connect(self.onQualityChange)
         toolbar.addWidget(self.quality_selector)
     
+    @Slot()
     def openFile(self):
         """Open a PDF file dialog."""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -230,7 +310,6 @@ class MainWindow(QMainWindow):
         """
         # Show loading indicator
         self.statusBar().showMessage(f"Loading {os.path.basename(file_path)}...")
-        QApplication.processEvents()  # Allow UI to update
         
         if self.pdf_viewer.loadDocument(file_path):
             # Store current file path
@@ -238,6 +317,9 @@ class MainWindow(QMainWindow):
             
             # Clear previous annotations
             self.annotation_handler.clear_annotations()
+            self._unsaved_annotations = []
+            self._group_pages = {}
+            self._dirty_pages.clear()
             
             # Update UI
             self.statusBar().showMessage(f"Loaded: {os.path.basename(file_path)}")
@@ -261,24 +343,23 @@ class MainWindow(QMainWindow):
         db_annotations = self.db.get_annotations_for_file(self.current_file)
         
         if db_annotations:
-            print(f"Found {len(db_annotations)} annotations in database")
-            multipage_count = sum(1 for a in db_annotations if a.get('is_multipage', False))
-            print(f"Of which {multipage_count} are part of multi-page annotations")
+            if logger.isEnabledFor(logging.INFO):
+                multipage_count = sum(1 for a in db_annotations if a.get('is_multipage', False))
+                logger.info("Found %d annotations in database, %d of them part of multi-page annotations",
+                            len(db_annotations), multipage_count)
+            
+            annotations = []
             
             for db_annot in db_annotations:
                 # Convert rect tuple to fitz.Rect
                 rect_x0, rect_y0, rect_x1, rect_y1 = db_annot['rect']
                 rect = fitz.Rect(rect_x0, rect_y0, rect_x1, rect_y1)
                 
-                # Add highlight to PDF
-                self.pdf_viewer.pdf_doc.add_highlight_annotation(db_annot['page'], rect)
-                
                 # Store annotation data
                 annot = {
                     'id': db_annot['id'],
                     'page': db_annot['page'],
                     'rect': rect,
-                    'rect_str': db_annot['rect_str'],
                     'text': db_annot['text'],
                     'type': db_annot.get('type', ''),
                     'field': db_annot.get('field', ''),
@@ -296,13 +377,17 @@ class MainWindow(QMainWindow):
                     annot['multipage_position'] = db_annot.get('multipage_position')
                     annot['multipage_type'] = db_annot.get('multipage_type', '')
                     annot['group_id'] = db_annot.get('group_id', '')
-                    print(f"Loaded multi-page annotation: position={annot['multipage_position']}, type={annot['multipage_type']}")
+                    logger.debug("Loaded multi-page annotation: position=%s, type=%s",
+                                 annot['multipage_position'], annot['multipage_type'])
                 
-                # Add to annotation handler's list
-                self.annotation_handler.annotations.append(annot)
-                
-                # Re-render the page
-                self.pdf_viewer.renderPage(db_annot['page'])
+                annotations.append(annot)
+            
+            # Add to annotation handler's list; their highlights are queued
+            self.annotation_handler.bulk_append(annotations)
+            
+            # Add the highlights one page at a time and re-render each of those pages once
+            for page_num in self.annotation_handler.flush():
+                self.markPageDirty(page_num)
             
             # Update annotations list in UI
             self.updateAnnotationsList()
@@ -311,6 +396,7 @@ class MainWindow(QMainWindow):
             self.updateAnnotationsList()
             self.statusBar().showMessage(f"No annotations found for {os.path.basename(self.current_file)}")
     
+    @Slot(str)
     def onTextSelected(self, text):
         """
         Handle text selection from PDF viewer.
@@ -320,6 +406,7 @@ class MainWindow(QMainWindow):
         """
         self.data_panel.updateSelectedText(text)
 
+    @Slot(int)
     def onAnnotationSelected(self, index):
         """
         Handle selection of an annotation in the data panel.
@@ -337,6 +424,7 @@ class MainWindow(QMainWindow):
                 # Update status
                 self.statusBar().showMessage(f"Navigated to annotation on page {annotation['page'] + 1}")
     
+    @Slot(dict)
     def onAnnotationAdded(self, annotation):
         """
         Handle annotation addition.
@@ -350,7 +438,7 @@ class MainWindow(QMainWindow):
         field_info = None
         
         if show_dialog:
-            dialog = AnnotationFieldDialog(self, self.annotation_handler.last_line_item_number)
+            dialog = self.fieldDialog()
             if dialog.exec() == QDialog.Accepted:
                 # Get field info
                 field_info = dialog.getFieldInfo()
@@ -393,16 +481,23 @@ class MainWindow(QMainWindow):
                 group_id=annotation.get('group_id', '')
             )
             
-            # Add to database
+            # Remember which pages the group touches, in case it is cleaned up
+            if complete_annotation.get('is_multipage'):
+                group_id = complete_annotation['group_id']
+                if complete_annotation['multipage_type'] == 'end':
+                    self._group_pages.pop(group_id, None)
+                else:
+                    self._group_pages.setdefault(group_id, set()).add(annotation['page'])
+            
+            # Add to database; the parts of a multi-page annotation are saved
+            # together in one transaction when the last part arrives
             if self.current_file:
-                annotation_id = self.db.add_annotation(self.current_file, complete_annotation)
-                
-                # Store the database ID
-                if annotation_id and self.annotation_handler.annotations:
-                    self.annotation_handler.annotations[-1]['id'] = annotation_id
+                self._unsaved_annotations.append(complete_annotation)
+                if not annotation.get('is_multipage', False) or annotation.get('multipage_type') == 'end':
+                    self.saveAnnotations()
             
             # Re-render the page
-            self.pdf_viewer.renderPage(annotation['page'])
+            self.markPageDirty(annotation['page'])
             
             # Update UI
             self.updateAnnotationsList()
@@ -410,14 +505,58 @@ class MainWindow(QMainWindow):
             # No field info, remove annotation highlight
             self._cleanup_annotation(annotation)
 
+    def saveAnnotations(self):
+        """
+        Save the annotations waiting in _unsaved_annotations to the database in one transaction.
+        
+        If the save fails the annotations stay queued and are retried with the next save.
+        
+        Returns:
+            bool: True if every queued annotation was saved
+        """
+        if not self._unsaved_annotations:
+            return True
+        
+        annotation_ids = self.db.add_annotations_bulk(self.current_file, self._unsaved_annotations)
+        if len(annotation_ids) != len(self._unsaved_annotations):
+            count = len(self._unsaved_annotations)
+            logger.error("Failed to save %d annotation(s) to the database", count)
+            QMessageBox.warning(
+                self,
+                "Save Failed",
+                f"Could not save {count} annotation(s) to the database.\n\n"
+                f"They are still shown and will be saved again with the next annotation."
+            )
+            return False
+        
+        # Store the database IDs
+        for annotation, annotation_id in zip(self._unsaved_annotations, annotation_ids):
+            self.annotation_handler.set_annotation_id(annotation, annotation_id)
+        self._unsaved_annotations = []
+        return True
+    
+    def fieldDialog(self):
+        """
+        Get the field selection dialog, reset for a new annotation.
+        
+        The dialog is built on first use and reused afterwards instead of
+        recreating its widgets for every annotation.
+        
+        Returns:
+            AnnotationFieldDialog: Dialog ready to be shown
+        """
+        last_line_item_number = self.annotation_handler.last_line_item_number
+        if self._field_dialog is None:
+            self._field_dialog = AnnotationFieldDialog(self, last_line_item_number)
+        else:
+            self._field_dialog.reset(last_line_item_number)
+        return self._field_dialog
+    
     def _process_date_field(self, field_info, text):
         """Process date fields."""
-        date_fields = ['rfq_date', 'due_date', 'requested_delivery_date']
-        if field_info.get('field') in date_fields:
-            from ..utils.date_utils import standardize_date
-            
+        if field_info.get('field') in DATE_FIELDS:
             # Clean the text for date fields
-            cleaned_text = text.replace('[', '').replace(']', '').strip()
+            cleaned_text = AnnotationHandler.clean_text_for_date_field(text, field_info.get('field'))
             
             # Pre-standardize the date and add it to the field info
             std_date = standardize_date(cleaned_text, log_level='error')
@@ -438,18 +577,38 @@ class MainWindow(QMainWindow):
         # Dialog cancelled, remove the annotation highlight
         self.pdf_viewer.pdf_doc.remove_annotation(annotation['page'])
         
-        # For multi-page selections, we may need to remove annotations from other pages
+        # For multi-page selections, also remove the group's highlights on other pages
         if annotation.get('is_multipage', False) and annotation.get('group_id'):
-            # Find and remove all annotations with this group_id
-            group_id = annotation.get('group_id')
-            for page_idx in range(self.pdf_viewer.pdf_doc.page_count):
+            for page_idx in self._group_pages.pop(annotation['group_id'], ()):
                 if page_idx != annotation['page']:
-                    # This is simplistic - we should ideally track which pages were annotated
                     self.pdf_viewer.pdf_doc.remove_annotation(page_idx)
+                    self.markPageDirty(page_idx)
         
         # Re-render the page
-        self.pdf_viewer.renderPage(annotation['page'])
+        self.markPageDirty(annotation['page'])
+    
+    def markPageDirty(self, page_num):
+        """
+        Schedule a page to be re-rendered.
+        
+        Pages marked during the same event loop turn are rendered once each,
+        however many annotations changed on them.
+        
+        Args:
+            page_num (int): Page number
+        """
+        self._dirty_pages.add(page_num)
+        if not self._render_timer.isActive():
+            self._render_timer.start()
+    
+    @Slot()
+    def _renderDirtyPages(self):
+        """Re-render every page marked by markPageDirty; off-screen pages wait until they are scrolled to."""
+        dirty_pages, self._dirty_pages = self._dirty_pages, set()
+        for page_num in sorted(dirty_pages):
+            self.pdf_viewer.refreshPage(page_num)
     
+    @Slot()
     def updateAnnotationsList(self):
         """Update the annotations list in the data panel."""
         self.data_panel.updateAnnotationsList(
@@ -457,40 +616,54 @@ class MainWindow(QMainWindow):
             self.onDeleteAnnotation
         )
     
-    def onDeleteAnnotation(self, index):
+    def onDeleteAnnotation(self, annotation_id, index=None):
         """
         Handle annotation deletion.
         
         Args:
-            index (int): Annotation index to delete
+            annotation_id (int or None): Database id of the annotation to delete,
+                                         or None if it was never saved
+            index (int, optional): Index of the annotation in the annotations list,
+                                   used when there is no database id
         """
-        if not self.annotation_handler.annotations or index >= len(self.annotation_handler.annotations):
-            self.statusBar().showMessage(f"Invalid annotation index: {index}")
-            return
+        # Get the annotation and remove it from PDF and list
+        if annotation_id is not None:
+            annotation = self.annotation_handler.get_annotation(annotation_id)
+            if annotation is None:
+                self.statusBar().showMessage(f"Invalid annotation id: {annotation_id}")
+                return
+            removed = self.annotation_handler.remove_annotation_by_id(annotation_id)
+        else:
+            annotations = self.annotation_handler.annotations
+            if index is None or not 0 <= index < len(annotations):
+                self.statusBar().showMessage(f"Invalid annotation index: {index}")
+                return
+            annotation = annotations[index]
+            removed = self.annotation_handler.remove_annotation_by_index(index)
         
-        # Get the annotation
-        annotation = self.annotation_handler.annotations[index]
+        if not removed:
+            self.statusBar().showMessage(f"Failed to remove annotation {annotation_id if annotation_id is not None else index}")
+            return
         
-        # Remove from PDF and list
-        if self.annotation_handler.remove_annotation_by_index(index):
-            # Remove from database if we have an ID
-            if 'id' in annotation:
-                success = self.db.remove_annotation(annotation['id'])
-                if success:
-                    self.statusBar().showMessage(f"Annotation {index} deleted")
-                else:
-                    self.statusBar().showMessage(f"Warning: Annotation removed from PDF but failed to delete from database")
+        if annotation_id is not None:
+            # Remove from database
+            success = self.db.remove_annotation(annotation_id)
+            if success:
+                self.statusBar().showMessage(f"Annotation {annotation_id} deleted")
             else:
-                self.statusBar().showMessage(f"Annotation {index} deleted (no database ID)")
-            
-            # Re-render the page
-            self.pdf_viewer.renderPage(annotation['page'])
-            
-            # Update UI
-            self.updateAnnotationsList()
+                self.statusBar().showMessage(f"Warning: Annotation removed from PDF but failed to delete from database")
         else:
-            self.statusBar().showMessage(f"Failed to remove annotation {index}")
+            # Not in the database (e.g. its save failed), so don't retry saving it either
+            self._unsaved_annotations = [a for a in self._unsaved_annotations if a is not annotation]
+            self.statusBar().showMessage(f"Annotation {index} deleted (not saved in database)")
+        
+        # Re-render the page
+        self.markPageDirty(annotation['page'])
+        
+        # Update UI
+        self.updateAnnotationsList()
     
+    @Slot()
     def undoLastAnnotation(self):
         """Remove the last annotation."""
         if not self.annotation_handler.annotations:
@@ -506,10 +679,10 @@ class MainWindow(QMainWindow):
             if 'id' in last_annot:
                 success = self.db.remove_annotation(last_annot['id'])
                 if not success:
-                    print(f"Warning: Failed to remove annotation ID {last_annot.get('id')} from database")
+                    logger.warning("Failed to remove annotation ID %s from database", last_annot.get('id'))
             
             # Re-render the page
-            self.pdf_viewer.renderPage(last_annot['page'])
+            self.markPageDirty(last_annot['page'])
             
             # Update UI
             self.updateAnnotationsList()
@@ -519,6 +692,7 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage("Failed to remove annotation")
             return False
     
+    @Slot()
     def exportAnnotationsToCSV(self):
         """Export annotations for the current PDF to CSV."""
         if not self.current_file:
@@ -539,8 +713,27 @@ class MainWindow(QMainWindow):
         if not output_path:
             return
         
-        # Export using the database
-        success = self.db.export_annotations_to_csv(self.current_file, output_path)
+        if self._exporting:
+            self.statusBar().showMessage("An export is already running")
+            return
+        
+        # Export in the background so large files don't block the window
+        self._exporting = True
+        self.statusBar().showMessage(f"Exporting annotations to {output_path}...")
+        self._export_pool.start(
+            _ExportJob(self._export_relay, self.db.db_path, self.current_file, output_path))
+    
+    @Slot(bool, str)
+    def onExportFinished(self, success, output_path):
+        """
+        Report the result of a background CSV export.
+        
+        Args:
+            success (bool): Whether the export succeeded
+            output_path (str): Path of the CSV file
+        """
+        self._exporting = False
+        self.statusBar().clearMessage()
         
         if success:
             QMessageBox.information(self, "Export Successful", 
@@ -549,6 +742,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Export Failed", 
                               "Failed to export annotations or no annotations to export.")
     
+    @Slot()
     def zoomIn(self):
         """Zoom in the PDF view."""
         self.pdf_viewer.zoomIn()
@@ -556,6 +750,7 @@ class MainWindow(QMainWindow):
         self.zoom_slider.setValue(int(self.pdf_viewer.zoom_factor * 100))
         self.zoom_label.setText(f"{int(self.pdf_viewer.zoom_factor * 100)}%")
     
+    @Slot()
     def zoomOut(self):
         """Zoom out the PDF view."""
         self.pdf_viewer.zoomOut()
@@ -563,14 +758,17 @@ class MainWindow(QMainWindow):
         self.zoom_slider.setValue(int(self.pdf_viewer.zoom_factor * 100))
         self.zoom_label.setText(f"{int(self.pdf_viewer.zoom_factor * 100)}%")
     
+    @Slot()
     def previousPage(self):
         """Go to previous page."""
         self.pdf_viewer.goToPrevPage()
     
+    @Slot()
     def nextPage(self):
         """Go to next page."""
         self.pdf_viewer.goToNextPage()
     
+    @Slot()
     def addAnnotation(self):
         """Toggle annotation mode."""
         self.pdf_viewer.is_annotating = not self.pdf_viewer.is_annotating
@@ -579,28 +777,38 @@ class MainWindow(QMainWindow):
         else:
             self.statusBar().showMessage("Annotation mode: OFF")
     
+    @Slot(int)
     def onZoomSliderChange(self, value):
         """
         Handle zoom slider value change.
         
+        The label follows the slider right away, while the view is zoomed to
+        the latest value at most once every ZOOM_DELAY_MS while dragging.
+        
         Args:
             value (int): New zoom percentage value
         """
+        self.zoom_label.setText(f"{value}%")
+        self._pending_zoom = value
+        if not self._zoom_timer.isActive():
+            self._zoom_timer.start()
+    
+    @Slot()
+    def _applyPendingZoom(self):
+        """Apply the latest zoom slider value to the view."""
+        value, self._pending_zoom = self._pending_zoom, None
+        if value is None:
+            return
+        
         new_factor = value / 100.0
         if self.pdf_viewer.zoom_factor != new_factor:
-            # Update zoom factor
-            self.pdf_viewer.zoom_factor = new_factor
-            
-            # Update zoom label
-            self.zoom_label.setText(f"{value}%")
-            
-            # Apply scaling
-            self.pdf_viewer.resetTransform()
-            self.pdf_viewer.scale(new_factor, new_factor)
+            # Apply scaling; the visible pages are re-rendered once the zoom settles
+            self.pdf_viewer.setZoom(new_factor)
             
             # Update status
             self.statusBar().showMessage(f"Zoom: {value}%")
     
+    @Slot(int)
     def onQualityChange(self, index):
         """
         Handle render quality change.
@@ -611,39 +819,22 @@ class MainWindow(QMainWindow):
         quality_map = {0: "standard", 1: "high", 2: "very high"}
         quality = quality_map.get(index, "high")
         
-        # Update PDF document quality settings
+        # Update PDF document quality settings; the quality decides how much
+        # finer than the screen pages are rendered
         if quality != self.pdf_viewer.pdf_doc.render_quality:
             self.pdf_viewer.pdf_doc.render_quality = quality
-            
-            # Update DPI based on quality
-            if quality == "standard":
-                self.pdf_viewer.pdf_doc.dpi = 200
-            elif quality == "high":
-                self.pdf_viewer.pdf_doc.dpi = 350
-            else:  # very high
-                self.pdf_viewer.pdf_doc.dpi = 600
                 
-            # Save current zoom
-            current_zoom = self.pdf_viewer.zoom_factor
-            
-            # Reload document if one is loaded
+            # Re-render the open document; annotations and zoom stay as they are
             if self.current_file:
                 # Show status
                 self.statusBar().showMessage(f"Applying {quality} quality rendering...")
                 
-                # Reload
-                self.loadPDF(self.current_file)
-                
-                # Restore zoom
-                self.pdf_viewer.zoom_factor = current_zoom
-                self.pdf_viewer.resetTransform()
-                self.pdf_viewer.scale(current_zoom, current_zoom)
-                
-                # Update zoom slider
-                self.zoom_slider.setValue(int(current_zoom * 100))
+                self.pdf_viewer.updateRenderResolution()
                 
+                current_zoom = self.pdf_viewer.zoom_factor
                 self.statusBar().showMessage(f"Quality set to {quality}, zoom: {int(current_zoom * 100)}%")
     
+    @Slot(str)
     def updateStatus(self, message):
         """
         Update the status bar message.
@@ -684,6 +875,10 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close event."""
+        # Stop the render thread before Qt tears the window down
+        self.pdf_viewer.pdf_doc.close()
+        # A running export reads the database on its own connection
+        self._export_pool.waitForDone()
         if hasattr(self, 'db'):
             self.db.close()
         event.accept()
\ No newline at end of file
@@ -1,14 +1,18 @@
 """PDF viewer widget for displaying and interacting with PDF documents."""
 
-from PySide6.QtWidgets import (QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, 
-                              QApplication)
-from PySide6.QtCore import Qt, QPointF, QRectF, QSizeF, Signal
-from PySide6.QtGui import QPen, QBrush, QColor, QPainter, QTransform
+from PySide6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
+from PySide6.QtCore import Qt, QPointF, QRectF, QSizeF, QTimer, Signal
+from PySide6.QtGui import QPen, QBrush, QColor, QPainter, QPixmap, QTransform
 
 import fitz  # PyMuPDF
+import logging
 import time
+from bisect import bisect_right
 from ..core.pdf_handler import PDFDocument
-from ..config import DEFAULT_ZOOM_FACTOR, MIN_ZOOM, MAX_ZOOM, PAGE_GAP
+from ..config import DEFAULT_ZOOM_FACTOR, MIN_ZOOM, MAX_ZOOM, PAGE_GAP, PRERENDER_PAGES, RENDER_OVERSAMPLE
+
+# Get a logger for this module
+logger = logging.getLogger(__name__)
 
 class PDFViewer(QGraphicsView):
     """Custom widget for displaying and interacting with PDF pages."""
@@ -19,6 +23,9 @@ class PDFViewer(QGraphicsView):
     annotationRemoved = Signal()    # Signal when annotation is removed
     statusUpdated = Signal(str)     # Signal for status updates
     
+    # Visible pages are re-rendered for a new zoom once it has been unchanged this long
+    ZOOM_RENDER_DELAY_MS = 150
+    
     def __init__(self, parent=None):
         """
         Initialize the PDF viewer.
@@ -32,11 +39,32 @@ class PDFViewer(QGraphicsView):
         
         # Initialize PDF document handler
         self.pdf_doc = PDFDocument()
+        self.pdf_doc.page_ready_callback = self.onPageReady
         
         # Page rendering properties
         self.pages = []  # Store rendered page info
         self.page_items = []  # Store QGraphicsItems for each page
         self.current_page = 0
+        # Scene width every page is laid out at; the view's zoom scales it to the screen
+        self.layout_width = 0
+        self.render_width_px = None  # Device-pixel width pages are rendered for at the current zoom
+        # Pages showing a render wider than they need at 100% zoom; released
+        # once they are scrolled well away so zooming in doesn't keep them all
+        self._zoomed_pages = set()
+        
+        # Pages whose render is out of date but that were off screen; they are
+        # rendered when scrolled into view, as are pages still waiting for
+        # their background render
+        self._stale_pages = set()
+        self._page_tops = []  # Scene y of each page's top edge, for finding visible pages
+        self._visible_timer = QTimer(self)
+        self._visible_timer.setSingleShot(True)
+        self._visible_timer.setInterval(0)
+        self._visible_timer.timeout.connect(self.renderVisiblePages)
+        self._zoom_render_timer = QTimer(self)
+        self._zoom_render_timer.setSingleShot(True)
+        self._zoom_render_timer.setInterval(self.ZOOM_RENDER_DELAY_MS)
+        self._zoom_render_timer.timeout.connect(self.updateRenderResolution)
         
         # View properties
         self.zoom_factor = DEFAULT_ZOOM_FACTOR
@@ -60,6 +88,11 @@ class PDFViewer(QGraphicsView):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         
+        # Scrolling or zooming can bring stale pages into view
+        for scroll_bar in (self.horizontalScrollBar(), self.verticalScrollBar()):
+            scroll_bar.valueChanged.connect(self._scheduleVisibleRender)
+            scroll_bar.rangeChanged.connect(self._scheduleVisibleRender)
+        
         # Add placeholder text
         self.placeholder = self.scene.addText("Drag and drop a PDF file here or use File > Open")
         self.placeholder.setPos(10, 10)
@@ -88,7 +121,13 @@ class PDFViewer(QGraphicsView):
         return False
     
     def renderAllPages(self):
-        """Render all pages of the PDF as a vertical stack."""
+        """
+        Lay out all pages of the PDF as a vertical stack and start rendering them.
+        
+        Only the visible page is rasterized here. Pages near it are rendered
+        on the render thread and appear through onPageReady; the others are
+        rendered as scrolling brings them close (see renderVisiblePages).
+        """
         if not self.pdf_doc.doc:
             return
         
@@ -96,47 +135,90 @@ class PDFViewer(QGraphicsView):
         self.scene.clear()
         self.pages = []
         self.page_items = []
+        self._page_tops = []
+        self._stale_pages.clear()
+        self._zoomed_pages.clear()
         
         # Track total height for positioning
         total_height = 0
+        max_width = 0
         
-        # Display a status message
-        self.scene.addText("Rendering pages, please wait...").setPos(10, 10)
-        QApplication.processEvents()  # Allow UI to update
+        # Pages are as wide as the viewport at 100% zoom
+        self.layout_width = self.viewport().width()
         
         for page_num in range(self.pdf_doc.page_count):
-            # Render page with current settings
-            pixmap, page_info = self.pdf_doc.render_page(page_num)
+            # Page sizes come from the PDF, so the layout needs no rendering
+            page_info = self.pdf_doc.page_layout(page_num, self.layout_width)
+            page_info['pixmap'] = None
+            width, height = page_info['width'], page_info['height']
             
-            if pixmap:
-                # Create pixmap item and add to scene
-                pixmap_item = QGraphicsPixmapItem(pixmap)
-                pixmap_item.setPos(0, total_height)
-                pixmap_item.setData(0, page_num)  # Store page number
-                
-                # Make pixmap selectable
-                pixmap_item.setFlag(QGraphicsPixmapItem.ItemIsSelectable, True)
-                
-                # Add to scene
-                self.scene.addItem(pixmap_item)
-                
-                # Store page info
-                page_info['rect'] = QRectF(0, total_height, pixmap.width(), pixmap.height())
-                self.pages.append(page_info)
-                self.page_items.append(pixmap_item)
-                
-                # Update height for next page
-                total_height += pixmap.height() + PAGE_GAP
-                
-                # Allow UI to update periodically
-                if page_num % 5 == 0:
-                    QApplication.processEvents()
+            # Create an empty pixmap item; the render is filled in later
+            pixmap_item = QGraphicsPixmapItem()
+            pixmap_item.setPos(0, total_height)
+            pixmap_item.setData(0, page_num)  # Store page number
+            
+            # Make pixmap selectable
+            pixmap_item.setFlag(QGraphicsPixmapItem.ItemIsSelectable, True)
+            
+            # Add to scene
+            self.scene.addItem(pixmap_item)
+            
+            # Store page info
+            page_info['rect'] = QRectF(0, total_height, width, height)
+            self.pages.append(page_info)
+            self.page_items.append(pixmap_item)
+            self._page_tops.append(total_height)
+            
+            # Update height for next page
+            total_height += height + PAGE_GAP
+            max_width = max(max_width, width)
         
-        # Set scene rect to contain all items
-        self.scene.setSceneRect(self.scene.itemsBoundingRect())
+        # Empty items have no bounds yet, so size the scene from the layout
+        self.scene.setSceneRect(QRectF(0, 0, max_width, max(total_height - PAGE_GAP, 0)))
         
         # Reset view to show the whole document
         self.resetView()
+        
+        # Size renders to the screen at the new zoom rather than the full DPI
+        self.render_width_px = self.renderTargetWidth()
+        
+        # The visible page is needed right away and its neighbors follow in
+        # the background; the rest are rendered as they are scrolled to
+        self.renderPage(self.current_page)
+        self.renderVisiblePages()
+    
+    def updateRenderResolution(self):
+        """
+        Re-render the visible pages if the zoom or render quality changed the width they need.
+        
+        The layout stays as it is; other pages keep their current render
+        until they are scrolled into view.
+        """
+        width = self.renderTargetWidth()
+        if not self.pages or width == self.render_width_px:
+            return
+        self.render_width_px = width
+        
+        for page_num, page in enumerate(self.pages):
+            if page['pixmap'] is not None:
+                self._stale_pages.add(page_num)
+        self.renderVisiblePages()
+    
+    def onPageReady(self, key, page_info):
+        """
+        Show a page rendered in the background.
+        
+        Args:
+            key (tuple): Cache key (page_num, dpi, render_quality, target_width_px)
+            page_info (dict): Page info for the render
+        """
+        page_num, _, _, target_width_px = key
+        # Renders for an older zoom or layout are only useful as cache entries
+        if target_width_px != self.render_width_px or page_num >= len(self.page_items):
+            return
+        if self.pages[page_num]['pixmap'] is None or page_num in self._stale_pages:
+            self._stale_pages.discard(page_num)
+            self._showPixmap(page_num, page_info['pixmap'])
     
     def renderPage(self, page_num):
         """
@@ -147,27 +229,26 @@ class PDFViewer(QGraphicsView):
         """
         if not self.pdf_doc.doc or page_num < 0 or page_num >= self.pdf_doc.page_count:
             return
+        self._stale_pages.discard(page_num)
             
-        # Render the page
-        pixmap, page_info = self.pdf_doc.render_page(page_num)
+        # Render the page at the same size as the rest of the document
+        pixmap, page_info = self.pdf_doc.render_page(page_num, target_width_px=self.render_width_px)
         
         if pixmap and page_num < len(self.pages) and page_num < len(self.page_items):
-            # Update the stored pixmap
-            self.pages[page_num]['pixmap'] = pixmap
-            
-            # Update the graphics item
+            # Update the stored pixmap and the graphics item
             try:
-                self.page_items[page_num].setPixmap(pixmap)
+                self._showPixmap(page_num, pixmap)
             except (RuntimeError, NameError):
                 # Handle case where item was deleted
                 pos_y = 0
                 if page_num > 0:
                     # Calculate position based on previous pages
                     for i in range(page_num):
-                        pos_y += self.pages[i]['pixmap'].height() + PAGE_GAP
+                        pos_y += self.pages[i]['height'] + PAGE_GAP
                 
                 # Create and add new pixmap item
                 new_pixmap_item = QGraphicsPixmapItem(pixmap)
+                new_pixmap_item.setScale(self.pages[page_num]['width'] / pixmap.width())
                 new_pixmap_item.setPos(0, pos_y)
                 new_pixmap_item.setData(0, page_num)
                 new_pixmap_item.setFlag(QGraphicsPixmapItem.ItemIsSelectable, True)
@@ -175,13 +256,124 @@ class PDFViewer(QGraphicsView):
                 self.scene.addItem(new_pixmap_item)
                 self.page_items[page_num] = new_pixmap_item
     
+    def _showPixmap(self, page_num, pixmap):
+        """
+        Show a render of a page, scaled to the page's size in the layout.
+        
+        Args:
+            page_num (int): Page number
+            pixmap (QPixmap): Rendered page
+        """
+        page = self.pages[page_num]
+        page['pixmap'] = pixmap
+        item = self.page_items[page_num]
+        item.setPixmap(pixmap)
+        item.setScale(page['width'] / pixmap.width())
+        if pixmap.width() > self.renderTargetWidth(1.0):
+            self._zoomed_pages.add(page_num)
+        else:
+            self._zoomed_pages.discard(page_num)
+    
+    def refreshPage(self, page_num):
+        """
+        Re-render a page now if it is on screen, otherwise once it scrolls into view.
+        
+        Args:
+            page_num (int): Page number to render
+        """
+        if self.isPageVisible(page_num):
+            self.renderPage(page_num)
+        elif 0 <= page_num < len(self.pages):
+            self._stale_pages.add(page_num)
+    
+    def isPageVisible(self, page_num):
+        """
+        Check whether any part of a page is inside the viewport.
+        
+        Args:
+            page_num (int): Page number
+            
+        Returns:
+            bool: True if the page is at least partly visible
+        """
+        if not 0 <= page_num < len(self.pages):
+            return False
+        visible_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        return self.pages[page_num]['rect'].intersects(visible_rect)
+    
+    def _scheduleVisibleRender(self):
+        """Check the pages in view once the current scroll or zoom has settled."""
+        if self.pages:
+            self._visible_timer.start()
+    
+    def renderVisiblePages(self):
+        """
+        Render the pages in view that are stale or have no render yet.
+        
+        Jumping ahead of the background render (e.g. with goToNextPage) would
+        otherwise show blank pages until their render comes up; renderPage also
+        moves the neighbors of each page up the prerender queue. The
+        PRERENDER_PAGES pages on either side are then queued for the render
+        thread, replacing whatever was queued for the previous position, and
+        zoomed-in renders of pages further away are released.
+        """
+        if not self.pages:
+            return
+        # Background renders queued for an earlier scroll position are no longer needed
+        self.pdf_doc.cancel_prerendering()
+        
+        visible_rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        # Pages are stacked top to bottom, so start from the one at the top edge
+        first_page = max(bisect_right(self._page_tops, visible_rect.top()) - 1, 0)
+        last_page = first_page
+        for page_num in range(first_page, len(self.pages)):
+            page = self.pages[page_num]
+            if page['rect'].top() > visible_rect.bottom():
+                break
+            last_page = page_num
+            if page['pixmap'] is None or page_num in self._stale_pages:
+                self.renderPage(page_num)
+        
+        # Nearest first, so the pages the user reaches next are ready first
+        for distance in range(1, PRERENDER_PAGES + 1):
+            for page_num in (last_page + distance, first_page - distance):
+                if 0 <= page_num < len(self.pages) and (
+                        self.pages[page_num]['pixmap'] is None or page_num in self._stale_pages):
+                    self.pdf_doc.prerender_page(page_num, self.render_width_px)
+        
+        # They are rendered again, mostly from the cache, when scrolled back to
+        nearby_pages = range(first_page - PRERENDER_PAGES, last_page + PRERENDER_PAGES + 1)
+        for page_num in [n for n in self._zoomed_pages if n not in nearby_pages]:
+            self.pages[page_num]['pixmap'] = None
+            self.page_items[page_num].setPixmap(QPixmap())
+            self._stale_pages.discard(page_num)
+            self._zoomed_pages.discard(page_num)
+    
+    def renderTargetWidth(self, zoom_factor=None):
+        """
+        Get the pixel width to render pages at for the layout and zoom.
+        
+        Args:
+            zoom_factor (float, optional): Zoom to render for, defaults to the current zoom
+            
+        Returns:
+            int or None: Width in device pixels, or None to render at full DPI
+        """
+        if self.layout_width <= 0:
+            return None
+        if zoom_factor is None:
+            zoom_factor = self.zoom_factor
+        # The render quality setting decides how far the screen resolution is exceeded
+        oversample = RENDER_OVERSAMPLE.get(self.pdf_doc.render_quality, 1.0)
+        return int(self.layout_width * zoom_factor * self.devicePixelRatioF() * oversample)
+    
     def resetView(self):
         """Reset view to show the document with appropriate zoom."""
-        scene_rect = self.scene.itemsBoundingRect()
+        scene_rect = self.scene.sceneRect()
         
         # Calculate initial zoom if needed
         if not self.initial_zoom_set and self.pdf_doc.page_count > 0 and len(self.pages) > 0:
-            first_page_width = self.pages[0]['pixmap'].width()
+            first_page_width = self.pages[0]['width']
             view_width = self.viewport().width()
             
             if first_page_width > 0 and view_width > 0:
@@ -194,8 +386,7 @@ class PDFViewer(QGraphicsView):
                 self.initial_zoom_set = True
         
         # Apply the zoom
-        self.resetTransform()
-        self.scale(self.zoom_factor, self.zoom_factor)
+        self.setZoom(self.zoom_factor)
         
         # Instead of centering on the entire document, focus on the top portion
         if len(self.pages) > 0:
@@ -206,15 +397,26 @@ class PDFViewer(QGraphicsView):
         # Emit status update
         self.statusUpdated.emit(f"Zoom: {int(self.zoom_factor * 100)}%")
     
+    def setZoom(self, zoom_factor):
+        """
+        Scale the view, and re-render the visible pages for it once zooming settles.
+        
+        Args:
+            zoom_factor (float): New zoom factor
+        """
+        self.zoom_factor = zoom_factor
+        self.resetTransform()
+        self.scale(zoom_factor, zoom_factor)
+        if self.pages:
+            self._zoom_render_timer.start()
+    
     def zoomIn(self):
         """Zoom in the view."""
         if self.zoom_factor < self.max_zoom:
             factor = 1.25
-            self.zoom_factor = min(self.zoom_factor * factor, self.max_zoom)
             
             # Apply scaling
-            self.resetTransform()
-            self.scale(self.zoom_factor, self.zoom_factor)
+            self.setZoom(min(self.zoom_factor * factor, self.max_zoom))
                 
             # Emit status update
             self.statusUpdated.emit(f"Zoom: {int(self.zoom_factor * 100)}%")
@@ -223,11 +425,9 @@ class PDFViewer(QGraphicsView):
         """Zoom out the view."""
         if self.zoom_factor > self.min_zoom:
             factor = 1.25
-            self.zoom_factor = max(self.zoom_factor / factor, self.min_zoom)
             
             # Apply scaling
-            self.resetTransform()
-            self.scale(self.zoom_factor, self.zoom_factor)
+            self.setZoom(max(self.zoom_factor / factor, self.min_zoom))
                 
             # Emit status update
             self.statusUpdated.emit(f"Zoom: {int(self.zoom_factor * 100)}%")
@@ -261,9 +461,9 @@ class PDFViewer(QGraphicsView):
         if page_idx >= 0:
             # Calculate position relative to the page
             page_pos = scene_pos - QPointF(page['rect'].left(), page['rect'].top())
-            # Scale to PDF coordinates based on zoom and DPI
-            pdf_x = page_pos.x() * 72 / self.pdf_doc.dpi
-            pdf_y = page_pos.y() * 72 / self.pdf_doc.dpi
+            # Scale to PDF coordinates based on the page's render scale
+            pdf_x = page_pos.x() / page['scale']
+            pdf_y = page_pos.y() / page['scale']
             return page_idx, (pdf_x, pdf_y)
         return -1, None
     
@@ -284,14 +484,14 @@ class PDFViewer(QGraphicsView):
         end_page_idx, _ = self.findPageAt(rect.bottomRight())
         
         if start_page_idx < 0 or end_page_idx < 0:
-            print("Selection doesn't cover any pages")
+            logger.debug("Selection doesn't cover any pages")
             return ""
             
         # Convert to PDF coordinates
         start_page_idx, start_pdf_pos = self.mapPDFPositionToPage(rect.topLeft())
         end_page_idx, end_pdf_pos = self.mapPDFPositionToPage(rect.bottomRight())
         
-        print(f"Selection spans pages {start_page_idx} to {end_page_idx}")
+        logger.debug("Selection spans pages %d to %d", start_page_idx, end_page_idx)
         
         text = ""
         
@@ -300,24 +500,24 @@ class PDFViewer(QGraphicsView):
             # Single page selection
             pdf_rect = fitz.Rect(start_pdf_pos[0], start_pdf_pos[1], end_pdf_pos[0], end_pdf_pos[1])
             text = self.pdf_doc.get_text_in_rect(start_page_idx, pdf_rect)
-            print(f"Single page text: '{text}'")
+            logger.debug("Single page text: %r", text)
         else:
             # Multi-page selection
             for page_idx in range(start_page_idx, end_page_idx + 1):
-                page = self.pdf_doc.doc[page_idx]
+                page_rect = self.pdf_doc.page_rect(page_idx)
                 
                 if page_idx == start_page_idx:
                     # First page - from start to bottom
-                    clip_rect = fitz.Rect(start_pdf_pos[0], start_pdf_pos[1], page.rect.width, page.rect.height)
+                    clip_rect = fitz.Rect(start_pdf_pos[0], start_pdf_pos[1], page_rect.width, page_rect.height)
                 elif page_idx == end_page_idx:
                     # Last page - from top to end position
                     clip_rect = fitz.Rect(0, 0, end_pdf_pos[0], end_pdf_pos[1])
                 else:
                     # Middle pages - full page
-                    clip_rect = page.rect
+                    clip_rect = page_rect
                     
                 page_text = self.pdf_doc.get_text_in_rect(page_idx, clip_rect)
-                print(f"Page {page_idx} text: '{page_text}'")
+                logger.debug("Page %d text: %r", page_idx, page_text)
                 text += page_text + "\n"
         
         return text
@@ -484,7 +684,7 @@ class PDFViewer(QGraphicsView):
             page = self.pages[page_num]
             
             # Convert PDF coordinates to scene coordinates
-            pdf_to_scene = self.pdf_doc.dpi / 72.0
+            pdf_to_scene = page['scale']
             scene_x = page['rect'].x() + (rect.x0 * pdf_to_scene)
             scene_y = page['rect'].y() + (rect.y0 * pdf_to_scene)
             
@@ -508,8 +708,8 @@ class PDFViewer(QGraphicsView):
         total_pages = end_page_idx - start_page_idx + 1
         
         # Handle first page
-        first_page = self.pdf_doc.doc[start_page_idx]
-        first_page_rect = fitz.Rect(start_pdf_pos[0], start_pdf_pos[1], first_page.rect.width, first_page.rect.height)
+        first_page = self.pdf_doc.page_rect(start_page_idx)
+        first_page_rect = fitz.Rect(start_pdf_pos[0], start_pdf_pos[1], first_page.width, first_page.height)
         first_page_text = self.pdf_doc.get_text_in_rect(start_page_idx, first_page_rect)
         
         # Emit signal for first page annotation
@@ -528,8 +728,7 @@ class PDFViewer(QGraphicsView):
         # Handle middle pages (if any)
         position = 2  # Start with position 2
         for page_idx in range(start_page_idx + 1, end_page_idx):
-            page = self.pdf_doc.doc[page_idx]
-            page_rect = page.rect
+            page_rect = self.pdf_doc.page_rect(page_idx)
             page_text = self.pdf_doc.get_text_in_rect(page_idx, page_rect)
             
             self.annotationAdded.emit({
@@ -1,33 +1,145 @@
 """Utilities for handling dates in the PDF Data Viewer."""
 
 from dateutil.parser import parse
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 import logging
+import re
 
 # Get a logger for this module
 logger = logging.getLogger(__name__)
 
+# Translation table that deletes square brackets in a single pass
+_BRACKET_TABLE = str.maketrans('', '', '[]')
+
+# All-numeric dates such as 2024-01-31, 1/31/2024 or 1/31/24
+_NUMERIC_RE = re.compile(r'^(\d{1,4})([/-])(\d{1,2})\2(\d{1,4})$')
+
+# Common date formats tried in order before falling back to dateutil.
+# Month-first formats come before day-first ones to match dateutil's default.
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+    "%Y/%m/%d",
+    "%d-%b-%Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+)
+
+def _expand_two_digit_year(year):
+    """
+    Expand a two-digit year the way dateutil does.
+    
+    The result is the year within 50 years of the current one, so in 2026
+    75 becomes 2075 and 76 becomes 1976.
+    
+    Args:
+        year (int): Year from 0 to 99
+        
+    Returns:
+        int: Four-digit year
+    """
+    this_year = date.today().year
+    year += this_year // 100 * 100
+    if year >= this_year + 50:
+        year -= 100
+    elif year < this_year - 50:
+        year += 100
+    return year
+
+def _parse_numeric_date(text):
+    """
+    Parse an all-numeric date without going through strptime or dateutil.
+    
+    Covers the numeric entries of DATE_FORMATS plus m/d/yy and tries them in
+    the same order, so the result matches what the slower paths would return.
+    
+    Args:
+        text (str): Cleaned date text
+        
+    Returns:
+        str or None: Date in YYYY-MM-DD format, or None if no numeric format fits
+    """
+    match = _NUMERIC_RE.match(text)
+    if not match:
+        return None
+    
+    first, separator, middle, last = match.groups()
+    if len(first) == 4:
+        # %Y-%m-%d or %Y/%m/%d
+        candidates = ((first, middle, last),) if len(last) <= 2 else ()
+    elif separator == '-' or len(first) > 2:
+        candidates = ()
+    elif len(last) == 4:
+        # %m/%d/%Y, then %d/%m/%Y
+        candidates = ((last, first, middle), (last, middle, first))
+    elif len(last) == 2:
+        # m/d/yy, with dateutil's sliding century
+        candidates = ((_expand_two_digit_year(int(last)), first, middle),)
+    else:
+        candidates = ()
+    
+    for year, month, day in candidates:
+        try:
+            return date(int(year), int(month), int(day)).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def clean_date_text(text):
+    """
+    Remove square brackets and surrounding whitespace from date text.
+    
+    Args:
+        text (str): Raw date text
+        
+    Returns:
+        str: Cleaned text
+    """
+    return text.translate(_BRACKET_TABLE).strip()
+
+# Every caller shares this single cache, so repeated dates hit it regardless of call site
+@lru_cache(maxsize=8192)
 def standardize_date(date_str, log_level='error'):
     """
     Convert various date formats to YYYY-MM-DD.
-    
+
+    All-numeric dates are parsed directly, other known formats are tried
+    with datetime.strptime, and dateutil is only used as a last resort. Results are memoized since the same date text
+    often recurs throughout a document.
+
     Args:
         date_str (str): Date string in various formats
         log_level (str): Logging level for errors ('error', 'debug', 'none')
-        
+
     Returns:
         str or None: Standardized date in YYYY-MM-DD format or None if parsing fails
     """
     if not date_str:
         return None
-        
+
     # Clean the date string by removing brackets and extra whitespace
-    cleaned_date_str = date_str.replace('[', '').replace(']', '').strip()
-    
+    cleaned_date_str = clean_date_text(date_str)
+
     # If the string is empty after cleaning, return None
     if not cleaned_date_str:
         return None
-    
+
+    # Numeric dates (the common case) are parsed directly
+    numeric = _parse_numeric_date(cleaned_date_str)
+    if numeric:
+        return numeric
+
+    # Try the known formats next
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned_date_str, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+
     try:
         date_obj = parse(cleaned_date_str)
         return date_obj.strftime("%Y-%m-%d")
@@ -39,4 +151,4 @@ def standardize_date(date_str, log_level='error'):
         elif log_level == 'debug':
             logger.debug(error_msg)
         # 'none' will not log anything
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,6 @@
+"""Shared pytest setup for the PDF Data Viewer tests."""
+
+import os
+
+# Keep test runs from attaching log handlers and writing to logs/
+os.environ.setdefault("PDFV_LOGGING", "0")
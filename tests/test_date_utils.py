@@ -0,0 +1,64 @@
+"""Tests for date standardization.
+
+standardize_date used to hand every string to dateutil's parser; the fast
+paths must keep returning exactly what that did.
+"""
+
+from datetime import date
+
+import pytest
+from dateutil.parser import parse
+
+from pdf_data_viewer.utils.date_utils import standardize_date
+
+# Results of the original dateutil-only implementation
+DATEUTIL_RESULTS = [
+    # Month first when both readings are valid, day first only when the month would be invalid
+    ("01/02/2024", "2024-01-02"),
+    ("12/11/2024", "2024-12-11"),
+    ("01/13/2024", "2024-01-13"),
+    ("13/01/2024", "2024-01-13"),
+    ("1-2-2024", "2024-01-02"),
+    ("13/01/24", "2024-01-13"),
+    ("1/2/24", "2024-01-02"),
+    # Year first
+    ("2024-01-31", "2024-01-31"),
+    ("2024/1/31", "2024-01-31"),
+    # Named months
+    ("Jan 5, 2024", "2024-01-05"),
+    ("5 January 2024", "2024-01-05"),
+    ("05-Jan-2024", "2024-01-05"),
+    # Brackets and whitespace are stripped
+    ("[01/02/2024]", "2024-01-02"),
+    ("  2/29/2024 ", "2024-02-29"),
+    # Invalid dates in either reading
+    ("31/02/2024", None),
+    ("02/30/2024", None),
+    ("2/29/2023", None),
+    ("13/13/2024", None),
+    ("00/01/2024", None),
+    ("2024-02-30", None),
+    ("not a date", None),
+    ("", None),
+    ("[]", None),
+]
+
+
+@pytest.mark.parametrize("text, expected", DATEUTIL_RESULTS)
+def test_matches_dateutil_results(text, expected):
+    assert standardize_date(text, log_level="none") == expected
+
+
+@pytest.mark.parametrize("year", ["00", "24", "49", "68", "69", "70", "75", "76", "99"])
+def test_two_digit_years_match_dateutil(year):
+    # dateutil picks the century relative to today, so compare against it directly
+    text = f"3/4/{year}"
+    assert standardize_date(text, log_level="none") == parse(text).strftime("%Y-%m-%d")
+
+
+@pytest.mark.parametrize("year", range(100))
+def test_two_digit_years_stay_within_fifty_years(year):
+    result = standardize_date(f"1/2/{year:02d}", log_level="none")
+    this_year = date.today().year
+    assert this_year - 50 <= int(result[:4]) < this_year + 50
+    assert int(result[2:4]) == year
@@ -0,0 +1,129 @@
+"""Tests for the annotation database, in particular the packed rect migration."""
+
+import sqlite3
+from collections import namedtuple
+
+import pytest
+
+from pdf_data_viewer.database.models import AnnotationDB
+
+Rect = namedtuple("Rect", "x0 y0 x1 y1")
+
+# Schema of databases created before rects were packed into a BLOB
+OLD_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS annotations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_name TEXT NOT NULL,
+    page_num INTEGER NOT NULL,
+    rect_x0 REAL NOT NULL,
+    rect_y0 REAL NOT NULL,
+    rect_x1 REAL NOT NULL,
+    rect_y1 REAL NOT NULL,
+    annotation_text TEXT,
+    annotation_type TEXT NOT NULL,
+    field_name TEXT NOT NULL,
+    line_item_number TEXT,
+    standardized_date TEXT,
+    is_multipage BOOLEAN DEFAULT 0,
+    multipage_position INTEGER,
+    multipage_type TEXT,
+    group_id TEXT,
+    date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+'''
+
+OLD_ROWS = [
+    # file_name, page_num, rect, text, type, field, line_item_number, standardized_date,
+    # is_multipage, multipage_position, multipage_type, group_id
+    ("a.pdf", 0, (72.0, 100.5, 300.25, 118.125), "RFQ-1", "meta", "rfq_number", "", None, 0, None, "", ""),
+    ("a.pdf", 0, (1.1, 2.2, 3.3, 4.4), "01/02/2024", "meta", "rfq_date", "", "2024-01-02", 0, None, "", ""),
+    ("a.pdf", 1, (36.0, 700.0, 580.0, 842.0), "part one", "line_item", "description", "1", None, 1, 1, "start", "g1"),
+    ("a.pdf", 2, (0.0, 0.0, 580.0, 90.75), "part two", "line_item", "description", "1", None, 1, 2, "end", "g1"),
+    ("b.pdf", 3, (10.0, 20.0, 30.0, 40.0), "other", "meta", "rfq_number", "", None, 0, None, "", ""),
+]
+
+
+@pytest.fixture
+def old_database(tmp_path):
+    """Create a database with the old REAL rect columns and return its path."""
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(OLD_SCHEMA)
+    conn.executemany(
+        "INSERT INTO annotations (file_name, page_num, rect_x0, rect_y0, rect_x1, rect_y1, "
+        "annotation_text, annotation_type, field_name, line_item_number, standardized_date, "
+        "is_multipage, multipage_position, multipage_type, group_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(row[0], row[1], *row[2], *row[3:]) for row in OLD_ROWS],
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _columns(db):
+    return {row["name"] for row in db.conn.execute("PRAGMA table_info(annotations)")}
+
+
+def test_migration_replaces_rect_columns_with_blob(old_database):
+    db = AnnotationDB(old_database)
+    try:
+        columns = _columns(db)
+        assert "rect" in columns
+        assert not {"rect_x0", "rect_y0", "rect_x1", "rect_y1"} & columns
+        assert db.conn.execute("SELECT count(*) FROM annotations").fetchone()[0] == len(OLD_ROWS)
+    finally:
+        db.close()
+
+
+def test_migrated_rects_and_fields_round_trip(old_database):
+    db = AnnotationDB(old_database)
+    try:
+        annotations = db.get_annotations_for_file("/some/dir/a.pdf")
+    finally:
+        db.close()
+    
+    expected = {row[3]: row for row in OLD_ROWS if row[0] == "a.pdf"}
+    assert len(annotations) == len(expected)
+    for annotation in annotations:
+        row = expected[annotation["text"]]
+        assert annotation["page"] == row[1]
+        assert annotation["rect"] == pytest.approx(row[2], abs=1e-3)
+        assert annotation["type"] == row[4]
+        assert annotation["field"] == row[5]
+        assert annotation.get("standardized_date") == row[7]
+        assert annotation.get("group_id", "") == row[11]
+    
+    # float32 noise is rounded away when reading back
+    dated = next(a for a in annotations if a["field"] == "rfq_date")
+    assert dated["rect"] == (1.1, 2.2, 3.3, 4.4)
+
+
+def test_migration_keeps_ids_and_allows_new_rows(old_database):
+    db = AnnotationDB(old_database)
+    try:
+        ids_before = sorted(a["id"] for a in db.get_annotations_for_file("a.pdf"))
+        assert ids_before == [1, 2, 3, 4]
+        
+        new_id = db.add_annotation("a.pdf", {
+            "page": 5,
+            "rect": Rect(5.5, 6.5, 7.5, 8.5),
+            "text": "new",
+            "type": "meta",
+            "field": "rfq_number",
+        })
+        assert new_id not in ids_before
+        added = next(a for a in db.get_annotations_for_file("a.pdf") if a["id"] == new_id)
+        assert added["rect"] == (5.5, 6.5, 7.5, 8.5)
+    finally:
+        db.close()
+
+
+def test_reopening_migrated_database_is_a_no_op(old_database):
+    AnnotationDB(old_database).close()
+    db = AnnotationDB(old_database)
+    try:
+        assert "rect_x0" not in _columns(db)
+        assert len(db.get_annotations_for_file("b.pdf")) == 1
+    finally:
+        db.close()